@@ -14,7 +14,7 @@ import os
 from datetime import datetime
 
 from comparison_service import get_all_quotes, compare_insurance
-from scrapers import SCRAPER_FUNCTIONS, shutdown_rma_manager
+from scrapers import SCRAPER_FUNCTIONS, shutdown_rma_manager, get_rma_queue_stats
 from database.models import init_database, DatabaseManager
 from auth import init_admin_user, login_required, admin_required, api_key_or_login_required, get_current_user, login_user, logout_user, init_system_user, get_system_user_id
 import atexit
@@ -148,6 +148,16 @@ def api_health_errors():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/admin/health/rma-queue', methods=['GET'])
+@api_key_or_login_required
+def api_health_rma_queue():
+    """Get RMA scrape queue depth (for load shedding; load balancers send X-API-Key)."""
+    try:
+        return jsonify({'success': True, 'queue': get_rma_queue_stats()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/admin/scrapers', methods=['GET'])
 @admin_required
 def get_scrapers():
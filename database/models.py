@@ -4,12 +4,24 @@ Database Models and Schema for Insurance Comparator
 
 import mysql.connector
 from mysql.connector import pooling
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Any, List, Optional
+import collections
+import itertools
 import json
 import os
+from contextlib import contextmanager
 from urllib.parse import urlparse
 
+from ttl_cache import TTLCache
+
+# Pooled connections; get_connection() fails at once when none is free. Each quote
+# saves results from one thread per provider, so the gunicorn threads (Dockerfile)
+# x 4 providers, plus one per request thread, must fit: 6 x (4 + 1) = 30.
+# mysql-connector caps a pool at 32.
+POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 32))
+
 # Parse MySQL configuration from environment
 def get_db_config():
     """Get database configuration from environment variables"""
@@ -26,7 +38,7 @@ def get_db_config():
             'password': parsed.password or '',
             'database': parsed.path.lstrip('/') if parsed.path else 'insurance_db',
             'pool_name': 'insurance_pool',
-            'pool_size': 5,
+            'pool_size': POOL_SIZE,
             'pool_reset_session': True,
             'autocommit': False
         }
@@ -39,7 +51,7 @@ def get_db_config():
             'password': os.getenv('MYSQL_PASSWORD', ''),
             'database': os.getenv('MYSQL_DATABASE', 'insurance_db'),
             'pool_name': 'insurance_pool',
-            'pool_size': 5,
+            'pool_size': POOL_SIZE,
             'pool_reset_session': True,
             'autocommit': False
         }
@@ -71,6 +83,32 @@ def get_connection():
         )
 
 
+# Tables the Excel export reads at once, each on its own pooled connection; kept well
+# below the pool size so request handlers still get connections during an export
+EXPORT_READERS = 2
+
+# Max rows per multi-row INSERT statement (keeps packets under max_allowed_packet)
+INSERT_BATCH_SIZE = 1000
+
+# plan_guarantees columns written by the bulk insert path (order matches _guarantee_row)
+GUARANTEE_COLUMNS = (
+    'plan_id', 'guarantee_name', 'guarantee_code', 'description',
+    'capital_guarantee', 'franchise', 'prime_annual',
+    'is_included', 'is_obligatory', 'is_optional',
+    'has_options', 'options_json', 'selected_option', 'display_order'
+)
+
+# Read caches: request history backs dashboard polling, option combinations
+# are read repeatedly for the same plan. Writes invalidate the affected keys.
+_request_history_cache = TTLCache(ttl=5)
+_option_combinations_cache = TTLCache(ttl=30)
+
+
+def _copy_rows(rows: List[Dict]) -> List[Dict]:
+    """Copies of cached row dicts, so callers can't edit what the cache holds"""
+    return [dict(row) for row in rows]
+
+
 def init_database():
     """Initialize database with all required tables"""
     conn = get_connection()
@@ -377,6 +415,26 @@ def init_database():
 class DatabaseManager:
     """Manager class for database operations"""
 
+    # ============ Transactions ============
+    @staticmethod
+    @contextmanager
+    def begin():
+        """
+        Open one pooled connection for several writes and commit them together.
+
+        Pass the yielded connection as `_conn` to the save_* methods; they then
+        skip their own commit/close. Rolls back if the block raises.
+        """
+        conn = get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     # ============ User Management ============
     @staticmethod
     def create_user(name: str, email: str, password: str, is_admin: bool = False) -> int:
@@ -832,6 +890,7 @@ class DatabaseManager:
         conn.commit()
         cursor.close()
         conn.close()
+        _request_history_cache.clear()
         return request_id
     
     @staticmethod
@@ -852,13 +911,14 @@ class DatabaseManager:
         conn.commit()
         cursor.close()
         conn.close()
+        _request_history_cache.clear()
 
     @staticmethod
     def save_provider_response(request_id: int, provider_name: str, provider_code: str,
                                 raw_response: dict, fetch_time: float, 
-                                status: str = 'success', error_message: str = None) -> int:
+                                status: str = 'success', error_message: str = None, _conn=None) -> int:
         """Save provider response and return its ID"""
-        conn = get_connection()
+        conn = _conn or get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -870,15 +930,16 @@ class DatabaseManager:
               fetch_time, status, error_message))
         
         response_id = cursor.lastrowid
-        conn.commit()
         cursor.close()
-        conn.close()
+        if _conn is None:
+            conn.commit()
+            conn.close()
         return response_id
     
     @staticmethod
-    def save_insurance_plan(response_id: int, request_id: int, plan_data: dict) -> int:
+    def save_insurance_plan(response_id: int, request_id: int, plan_data: dict, _conn=None) -> int:
         """Save insurance plan and return its ID"""
-        conn = get_connection()
+        conn = _conn or get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -909,15 +970,16 @@ class DatabaseManager:
         ))
         
         plan_id = cursor.lastrowid
-        conn.commit()
         cursor.close()
-        conn.close()
+        if _conn is None:
+            conn.commit()
+            conn.close()
         return plan_id
     
     @staticmethod
-    def save_plan_guarantee(plan_id: int, guarantee_data: dict) -> int:
+    def save_plan_guarantee(plan_id: int, guarantee_data: dict, _conn=None) -> int:
         """Save plan guarantee and return its ID"""
-        conn = get_connection()
+        conn = _conn or get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -927,33 +989,46 @@ class DatabaseManager:
              is_included, is_obligatory, is_optional,
              has_options, options_json, selected_option, display_order)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (
-            plan_id,
-            guarantee_data.get('guarantee_name'),
-            guarantee_data.get('guarantee_code'),
-            guarantee_data.get('description'),
-            guarantee_data.get('capital_guarantee'),
-            guarantee_data.get('franchise'),
-            guarantee_data.get('prime_annual', 0),
-            guarantee_data.get('is_included', True),
-            guarantee_data.get('is_obligatory', False),
-            guarantee_data.get('is_optional', False),
-            guarantee_data.get('has_options', False),
-            json.dumps(guarantee_data.get('options', [])) if guarantee_data.get('options') else None,
-            guarantee_data.get('selected_option'),
-            guarantee_data.get('display_order', 0)
-        ))
+        ''', _guarantee_row(plan_id, guarantee_data))
         
         guarantee_id = cursor.lastrowid
-        conn.commit()
         cursor.close()
-        conn.close()
+        if _conn is None:
+            conn.commit()
+            conn.close()
         return guarantee_id
+
+    @staticmethod
+    def save_plan_guarantees_bulk(plan_id: int, guarantees: List[dict], _conn=None) -> int:
+        """
+        Save all guarantees of a plan in one statement and return how many were saved.
+        IDs come from AUTO_INCREMENT like every other insert into the table.
+        """
+        if not guarantees:
+            return 0
+
+        conn = _conn or get_connection()
+        cursor = conn.cursor()
+
+        try:
+            _insert_rows(cursor, 'plan_guarantees', GUARANTEE_COLUMNS,
+                         [_guarantee_row(plan_id, g) for g in guarantees])
+            if _conn is None:
+                conn.commit()
+            return len(guarantees)
+        except Exception:
+            if _conn is None:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            if _conn is None:
+                conn.close()
     
     @staticmethod
-    def save_selectable_field(plan_id: int, field_name: str, field_title: str, field_order: int = 0) -> int:
+    def save_selectable_field(plan_id: int, field_name: str, field_title: str, field_order: int = 0, _conn=None) -> int:
         """Save selectable field and return its ID"""
-        conn = get_connection()
+        conn = _conn or get_connection()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -962,15 +1037,16 @@ class DatabaseManager:
         ''', (plan_id, field_name, field_title, field_order))
 
         field_id = cursor.lastrowid
-        conn.commit()
         cursor.close()
-        conn.close()
+        if _conn is None:
+            conn.commit()
+            conn.close()
         return field_id
 
     @staticmethod
-    def save_selectable_option(field_id: int, option_id: str, option_label: str, is_default: bool = False) -> int:
+    def save_selectable_option(field_id: int, option_id: str, option_label: str, is_default: bool = False, _conn=None) -> int:
         """Save selectable option and return its ID"""
-        conn = get_connection()
+        conn = _conn or get_connection()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -979,16 +1055,64 @@ class DatabaseManager:
         ''', (field_id, option_id, option_label, is_default))
 
         option_id_pk = cursor.lastrowid
-        conn.commit()
         cursor.close()
-        conn.close()
+        if _conn is None:
+            conn.commit()
+            conn.close()
         return option_id_pk
 
+    @staticmethod
+    def save_selectable_fields_bulk(plan_id: int, fields: List[dict], _conn=None) -> List[int]:
+        """
+        Save selectable fields of a plan together with their options and return the field IDs.
+
+        Each field dict holds field_name, field_title, field_order and an 'options' list of
+        {option_id, option_label, is_default}. Fields are inserted one by one for their
+        AUTO_INCREMENT IDs (a plan has a handful); all their options go in one statement.
+        """
+        if not fields:
+            return []
+
+        conn = _conn or get_connection()
+        cursor = conn.cursor()
+
+        try:
+            field_ids = []
+            for f in fields:
+                cursor.execute('''
+                    INSERT INTO selectable_fields (plan_id, field_name, field_title, field_order)
+                    VALUES (%s, %s, %s, %s)
+                ''', (plan_id, f.get('field_name'), f.get('field_title'), f.get('field_order', 0)))
+                field_ids.append(cursor.lastrowid)
+
+            option_rows = [
+                (field_id, o.get('option_id'), o.get('option_label'), o.get('is_default', False))
+                for field_id, f in zip(field_ids, fields)
+                for o in f.get('options', [])
+            ]
+            _insert_rows(cursor, 'selectable_options',
+                         ('field_id', 'option_id', 'option_label', 'is_default'), option_rows)
+
+            if _conn is None:
+                conn.commit()
+            return field_ids
+        except Exception:
+            if _conn is None:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            if _conn is None:
+                conn.close()
+
     @staticmethod
     def save_option_combination(plan_id: int, combination_key: str, combination_params: str,
-                               pricing_data: dict, is_default: bool = False) -> int:
-        """Save option combination pricing and return its ID"""
-        conn = get_connection()
+                               pricing_data: dict, is_default: bool = False, _conn=None) -> int:
+        """
+        Save option combination pricing and return its ID.
+        With `_conn` the caller drops the plan's cached combinations once it commits.
+        """
+        conn = _conn or get_connection()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -1010,14 +1134,72 @@ class DatabaseManager:
         ))
 
         combination_id = cursor.lastrowid
-        conn.commit()
         cursor.close()
-        conn.close()
+        if _conn is None:
+            conn.commit()
+            conn.close()
+            _option_combinations_cache.pop(plan_id)
         return combination_id
 
+    @staticmethod
+    def persist_full_response(response: dict) -> int:
+        """
+        Save a provider response with all its plans in a single transaction.
+
+        Args:
+            response: request_id, provider_name, provider_code, raw_response, fetch_time,
+                status, error_message and 'plans'. Each plan is a plan_data dict that may
+                also hold 'guarantees', 'selectable_fields' (with their 'options') and
+                'option_combinations' (combination_key, combination_params, is_default
+                plus the pricing columns).
+
+        Returns:
+            The provider response ID
+        """
+        request_id = response['request_id']
+        combined_plan_ids = []
+
+        with DatabaseManager.begin() as conn:
+            response_id = DatabaseManager.save_provider_response(
+                request_id,
+                response.get('provider_name'),
+                response.get('provider_code'),
+                response.get('raw_response'),
+                response.get('fetch_time'),
+                status=response.get('status', 'success'),
+                error_message=response.get('error_message'),
+                _conn=conn
+            )
+
+            for plan in response.get('plans', []):
+                plan_id = DatabaseManager.save_insurance_plan(response_id, request_id, plan, _conn=conn)
+                DatabaseManager.save_plan_guarantees_bulk(plan_id, plan.get('guarantees', []), _conn=conn)
+                DatabaseManager.save_selectable_fields_bulk(plan_id, plan.get('selectable_fields', []), _conn=conn)
+
+                if plan.get('option_combinations'):
+                    combined_plan_ids.append(plan_id)
+                for combination in plan.get('option_combinations', []):
+                    DatabaseManager.save_option_combination(
+                        plan_id,
+                        combination.get('combination_key'),
+                        combination.get('combination_params'),
+                        combination,
+                        is_default=combination.get('is_default', False),
+                        _conn=conn
+                    )
+
+        # Only after commit: a read in between would re-cache the old rows
+        for plan_id in combined_plan_ids:
+            _option_combinations_cache.pop(plan_id)
+        return response_id
+
     @staticmethod
     def get_option_combinations(plan_id: int) -> List[Dict]:
         """Get all option combinations for a plan"""
+        cached = _option_combinations_cache.get(plan_id)
+        if cached is not None:
+            return _copy_rows(cached)
+
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -1030,11 +1212,16 @@ class DatabaseManager:
         rows = cursor.fetchall()
         cursor.close()
         conn.close()
-        return rows
+        _option_combinations_cache.set(plan_id, rows)
+        return _copy_rows(rows)
 
     @staticmethod
     def get_request_history(limit: int = 50) -> List[Dict]:
         """Get recent request history"""
+        cached = _request_history_cache.get(limit)
+        if cached is not None:
+            return _copy_rows(cached)
+
         conn = get_connection()
         cursor = conn.cursor(dictionary=True)
 
@@ -1047,13 +1234,15 @@ class DatabaseManager:
         rows = cursor.fetchall()
         cursor.close()
         conn.close()
-        return rows
+        _request_history_cache.set(limit, rows)
+        return _copy_rows(rows)
 
     @staticmethod
     def export_database_to_excel(filepath: str) -> bool:
         """Export entire database to Excel file with each table as a sheet"""
         try:
             import openpyxl
+            from openpyxl.cell import WriteOnlyCell
             from openpyxl.styles import Font, PatternFill, Alignment
             from openpyxl.utils import get_column_letter
 
@@ -1070,61 +1259,70 @@ class DatabaseManager:
 
             tables = [row['TABLE_NAME'] for row in cursor.fetchall()]
 
-            # Create Excel workbook
-            wb = openpyxl.Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-
-            for table_name in tables:
-                # Get table data
-                cursor.execute(f"SELECT * FROM `{table_name}`")
-                rows = cursor.fetchall()
-
-                if not rows:
-                    continue  # Skip empty tables
-
-                # Create sheet for this table
-                ws = wb.create_sheet(title=table_name[:31])  # Excel sheet name limit is 31 chars
-
-                # Get column names
-                columns = list(rows[0].keys())
-
-                # Write header row
-                ws.append(columns)
-
-                # Style header row
-                header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                header_font = Font(bold=True, color="FFFFFF")
-
-                for cell in ws[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
-
-                # Write data rows
-                for row in rows:
-                    ws.append(list(row.values()))
-
-                # Auto-adjust column widths
-                for idx, column in enumerate(columns, 1):
-                    column_letter = get_column_letter(idx)
-                    max_length = len(str(column))
-
-                    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=idx, max_col=idx):
-                        for cell in row:
-                            try:
-                                if cell.value and len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
+            # Release this connection before the table readers take theirs
+            cursor.close()
+            conn.close()
 
-                    adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-                    ws.column_dimensions[column_letter].width = adjusted_width
+            # Create write-only Excel workbook (rows are streamed, never re-read)
+            wb = openpyxl.Workbook(write_only=True)
+
+            # Header style objects, shared by every sheet
+            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+            header_font = Font(bold=True, color="FFFFFF")
+            header_alignment = Alignment(horizontal="center", vertical="center")
+
+            def header_cell(ws, column):
+                cell = WriteOnlyCell(ws, value=column)
+                cell.fill = header_fill
+                cell.font = header_font
+                cell.alignment = header_alignment
+                return cell
+
+            # Read ahead up to EXPORT_READERS tables on pooled connections while this
+            # thread writes the workbook in table order; only those tables' rows are
+            # held in memory at once
+            remaining = iter(tables)
+            with ThreadPoolExecutor(max_workers=EXPORT_READERS) as executor:
+                pending = collections.deque(
+                    (name, executor.submit(_fetch_table_rows, name))
+                    for name in itertools.islice(remaining, EXPORT_READERS)
+                )
+                while pending:
+                    table_name, future = pending.popleft()
+                    rows = future.result()
+                    next_table = next(remaining, None)
+                    if next_table is not None:
+                        pending.append((next_table, executor.submit(_fetch_table_rows, next_table)))
+
+                    if not rows:
+                        continue  # Skip empty tables
+
+                    # Create sheet for this table
+                    ws = wb.create_sheet(title=table_name[:31])  # Excel sheet name limit is 31 chars
+
+                    # Get column names
+                    columns = list(rows[0].keys())
+
+                    # Auto-adjust column widths (must be set before rows are written)
+                    for idx, column in enumerate(columns, 1):
+                        max_length = len(str(column))
+                        for row in rows:
+                            value = row[column]
+                            if value and len(str(value)) > max_length:
+                                max_length = len(str(value))
+
+                        adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
+                        ws.column_dimensions[get_column_letter(idx)].width = adjusted_width
+
+                    # Write styled header row
+                    ws.append([header_cell(ws, column) for column in columns])
+
+                    # Write data rows
+                    for row in rows:
+                        ws.append(list(row.values()))
 
             # Save workbook
             wb.save(filepath)
-
-            cursor.close()
-            conn.close()
             return True
 
         except Exception as e:
@@ -1310,6 +1508,56 @@ class DatabaseManager:
             conn.close()
 
 
+def _fetch_table_rows(table_name: str) -> List[Dict]:
+    """Read every row of a table on its own pooled connection (used by the Excel export)"""
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT * FROM `{table_name}`")
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _insert_rows(cursor, table: str, columns: tuple, rows: List[tuple],
+                 batch_size: int = INSERT_BATCH_SIZE):
+    """
+    Insert rows with explicit multi-row INSERT ... VALUES (...), (...) statements.
+
+    One round trip per batch regardless of how the connector handles executemany;
+    batches are capped to stay well under max_allowed_packet.
+    """
+    column_sql = ", ".join(columns)
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        cursor.execute(
+            f"INSERT INTO `{table}` ({column_sql}) VALUES " + ", ".join([row_sql] * len(batch)),
+            [value for row in batch for value in row]
+        )
+
+
+def _guarantee_row(plan_id: int, guarantee_data: dict) -> tuple:
+    """Build the plan_guarantees column values (without id) for one guarantee"""
+    return (
+        plan_id,
+        guarantee_data.get('guarantee_name'),
+        guarantee_data.get('guarantee_code'),
+        guarantee_data.get('description'),
+        guarantee_data.get('capital_guarantee'),
+        guarantee_data.get('franchise'),
+        guarantee_data.get('prime_annual', 0),
+        guarantee_data.get('is_included', True),
+        guarantee_data.get('is_obligatory', False),
+        guarantee_data.get('is_optional', False),
+        guarantee_data.get('has_options', False),
+        json.dumps(guarantee_data.get('options', [])) if guarantee_data.get('options') else None,
+        guarantee_data.get('selected_option'),
+        guarantee_data.get('display_order', 0)
+    )
+
+
 def _parse_field_from_error(error_msg: str, row: dict) -> list:
     """
     Parse error message + form row to identify which fields are likely problematic.
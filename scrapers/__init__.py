@@ -8,7 +8,7 @@ Simple functional style - each scraper has a main function to call.
 from .axa_scraper import scrape_axa, fetch_axa_quotation
 from .mcma_scraper import scrape_mcma, update_mcma_quote, create_mcma_subscription, get_mcma_packs
 from .rma_scraper import scrape_rma, filter_rma_response
-from .rma_browser_manager import scrape_rma_queued, shutdown_rma_manager
+from .rma_browser_manager import scrape_rma_queued, shutdown_rma_manager, get_rma_queue_stats
 from .sanlam_scraper import scrape_sanlam, fetch_all_formulas
 
 # Import base classes (kept for compatibility with existing code)
@@ -65,6 +65,7 @@ __all__ = [
 
     # Browser manager
     'shutdown_rma_manager',
+    'get_rma_queue_stats',
 
     # Registry
     'SCRAPER_FUNCTIONS',
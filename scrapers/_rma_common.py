@@ -0,0 +1,69 @@
+"""
+Helpers shared by the RMA capture scripts (testing.py, testing2.py):
+request blocking, offline fixture, bulk form filling and output.
+MUI dropdowns go through rma_scraper.fill_mui_dropdown_async.
+Async Playwright pages only.
+"""
+
+import os
+import orjson
+
+# OFFLINE=1: the offers API is answered from this fixture, so the form flow can
+# be checked without waiting on (or hitting) the RMA backend
+OFFERS_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "offers.json")
+
+# Resources the form does not need: aborted before download
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+TRACKER_HOSTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net", "hotjar.com", "segment.com", "facebook.net")
+
+# Results file, read by tools: written compact
+# (python -m json.tool insurance_data.json for a readable copy)
+OUTPUT_FILE = "insurance_data.json"
+
+
+def write_output(output_data):
+    """Write the captured request(s) + offers response to OUTPUT_FILE"""
+    with open(OUTPUT_FILE, "wb") as f:
+        f.write(orjson.dumps(output_data, option=orjson.OPT_NON_STR_KEYS))
+
+
+async def block_heavy_resources(route):
+    """Route handler: abort assets and trackers, let everything else through"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(h in request.url for h in TRACKER_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# Sets every value in one page.evaluate. MUI inputs are React-controlled: the value
+# goes through the native setter and an 'input' event so React sees the change.
+_FILL_FORM_JS = """(fields) => {
+    const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    const missing = [];
+    for (const [selector, index, value] of fields) {
+        const el = document.querySelectorAll(selector)[index];
+        if (!el) { missing.push(selector + '#' + index); continue; }
+        setter.call(el, value);
+        el.dispatchEvent(new Event('input', { bubbles: true }));
+    }
+    return missing;
+}"""
+
+
+async def fill_form_bulk(page, fields):
+    """Fill (selector, nth, value) text inputs in a single browser round-trip"""
+    missing = await page.evaluate(_FILL_FORM_JS, [list(f) for f in fields])
+    for field in missing:
+        print(f"Warning: Could not fill {field}")
+
+
+async def mock_offers(page):
+    """Answer /offer/api/offers from OFFERS_FIXTURE (registered last, so it wins over blocking)"""
+    with open(OFFERS_FIXTURE, "rb") as f:
+        body = f.read()
+
+    async def fulfill(route):
+        await route.fulfill(status=200, content_type="application/json", body=body)
+
+    await page.route("**/offer/api/offers*", fulfill)
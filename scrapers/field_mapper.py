@@ -3,8 +3,9 @@ Field Mapper for Insurance Quotation Forms
 Maps form fields to provider-specific requirements with transformations
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
 try:
     from zoneinfo import ZoneInfo
 except ImportError:
@@ -13,6 +14,9 @@ except ImportError:
 import random
 import string
 
+# AXA servers work in Moroccan time; building the ZoneInfo hits the tz database
+_MOROCCO_TZ = ZoneInfo('Africa/Casablanca')
+
 # ============ BRAND MAPPING ============
 BRAND_CODE_MAPPING = {
     "sanlam": {
@@ -136,6 +140,24 @@ def generate_random_identity():
     }
 
 # ============ DATE FORMATTER ============
+# Form date fields the mappers reformat for the provider payloads
+DATE_FIELDS = ("date_naissance", "date_mec", "date_permis")
+
+
+@lru_cache(maxsize=256)
+def _parse_date_formats(date_str: str) -> Tuple[str, str]:
+    """
+    Parse a YYYY-MM-DD date once and return its (YYYY-MM-DD, DD-MM-YYYY) forms.
+    Cached, so the same form dates are parsed once across all provider mappers.
+    """
+    try:
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+    except Exception as e:
+        print(f"Date format error: {e}")
+        return date_str, date_str
+    return date_obj.strftime("%Y-%m-%d"), date_obj.strftime("%d-%m-%Y")
+
+
 def format_date(date_str: str, format_type: str = "YYYY-MM-DD") -> str:
     """
     Format date string to required format
@@ -145,20 +167,28 @@ def format_date(date_str: str, format_type: str = "YYYY-MM-DD") -> str:
     if not date_str:
         return ""
 
-    try:
-        # Parse from YYYY-MM-DD
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-
-        if format_type == "DD-MM-YYYY":
-            return date_obj.strftime("%d-%m-%Y")
-        elif format_type == "YYYY-MM-DD":
-            return date_obj.strftime("%Y-%m-%d")
-        else:
-            return date_str
-    except Exception as e:
-        print(f"Date format error: {e}")
+    ymd, dmy = _parse_date_formats(date_str)
+    if format_type == "DD-MM-YYYY":
+        return dmy
+    elif format_type == "YYYY-MM-DD":
+        return ymd
+    else:
         return date_str
 
+
+def _prep_dates(form_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Pre-format every form date in both variants used by the mappers
+    Returns keys like date_naissance_ymd / date_naissance_dmy
+    """
+    dates = {}
+    for field in DATE_FIELDS:
+        value = form_data.get(field)
+        ymd, dmy = _parse_date_formats(value) if value else ("", "")
+        dates[f"{field}_ymd"] = ymd
+        dates[f"{field}_dmy"] = dmy
+    return dates
+
 # ============ FIELD MAPPER CLASS ============
 class FieldMapper:
     """Maps form fields to provider-specific payloads"""
@@ -181,6 +211,7 @@ class FieldMapper:
 
         # Get brand code for Sanlam
         brand_code = BRAND_CODE_MAPPING['sanlam'].get(brand, '10819')
+        dates = _prep_dates(form_data)
 
         return {
             "driver": {
@@ -189,7 +220,7 @@ class FieldMapper:
                 "licenseCategory": "B",
                 "lastName": form_data.get('nom', 'Client'),
                 "firstName": form_data.get('prenom', 'Test'),
-                "birthDate": format_date(form_data.get('date_naissance'), "YYYY-MM-DD"),
+                "birthDate": dates['date_naissance_ymd'],
                 "CIN": "BJ1111111",
                 "sex": "M",
                 "nature": "1",
@@ -207,7 +238,7 @@ class FieldMapper:
                 "civility": "0",
                 "lastName": form_data.get('nom', 'Client'),
                 "firstName": form_data.get('prenom', 'Test'),
-                "birthDate": format_date(form_data.get('date_naissance'), "YYYY-MM-DD"),
+                "birthDate": dates['date_naissance_ymd'],
                 "adress": "sample addresse",
                 "city": form_data.get('ville', 'Casablanca'),
                 "phoneNumber": phone,
@@ -227,7 +258,7 @@ class FieldMapper:
                 "registrationFormat": PLATE_TYPE_MAPPING['sanlam'].get(form_data.get('type_plaque', 'standard'), "3"),
                 "newValue": int(form_data.get('valeur_neuf', 650000)),
                 "combustion": FUEL_MAPPING['sanlam'].get(fuel, 'D'),
-                "circulationDate": format_date(form_data.get('date_mec'), "YYYY-MM-DD"),
+                "circulationDate": dates['date_mec_ymd'],
                 "marketValue": int(form_data.get('valeur_actuelle', 650000)),
                 "seatsNumber": 5
             },
@@ -248,12 +279,12 @@ class FieldMapper:
         """Map form data to AXA API payload"""
         fuel = form_data.get('carburant', 'diesel').lower()
         # Get today's date in Morocco timezone (Africa/Casablanca) - where AXA servers are located
-        morocco_tz = ZoneInfo('Africa/Casablanca')
-        morocco_now = datetime.now(morocco_tz)
+        morocco_now = datetime.now(_MOROCCO_TZ)
         future_date = morocco_now.strftime("%d-%m-%Y")
 
         # Get dummy identity for phone/plate
         dummy = generate_random_identity()
+        dates = _prep_dates(form_data)
 
         return {
             "contrat": {
@@ -271,18 +302,18 @@ class FieldMapper:
                 "typePersonne": "P",
                 "assureEstConducteur": "O",
                 "identifiant": "a0",
-                "dateNaissanceConducteur": format_date(form_data.get('date_naissance'), "DD-MM-YYYY"),
+                "dateNaissanceConducteur": dates['date_naissance_dmy'],
                 "isFonctionnaire": "N",
                 "codeConvention": 0,
                 "newClient": "O",
                 "nom": form_data.get('nom', 'Client'),
                 "prenom": form_data.get('prenom', 'Test'),
-                "dateNaissanceAssure": format_date(form_data.get('date_naissance'), "DD-MM-YYYY"),
+                "dateNaissanceAssure": dates['date_naissance_dmy'],
                 "tauxReduction": 0
             },
             "vehicule": {
                 "codeUsage": "1B",
-                "dateMisCirculation": format_date(form_data.get('date_mec'), "DD-MM-YYYY"),
+                "dateMisCirculation": dates['date_mec_dmy'],
                 "matricule": dummy['plate'],
                 "valeurNeuf": int(form_data.get('valeur_neuf', 400000)),
                 "valeurVenale": int(form_data.get('valeur_actuelle', 300000)),
@@ -297,7 +328,7 @@ class FieldMapper:
             "leadInfos": {
                 "city": "CASABLANCA",
                 "phoneNumber": dummy['phone'],
-                "licenceDate": format_date(form_data.get('date_permis'), "DD-MM-YYYY"),
+                "licenceDate": dates['date_permis_dmy'],
                 "brandName": form_data.get('marque', 'RENAULT').upper(),
                 "intermediateName": "AKER ASSURANCE",
                 "marketingConsent": True,
@@ -342,9 +373,10 @@ class FieldMapper:
     def map_to_mcma(form_data: Dict[str, Any]) -> Dict[str, Any]:
         """Map form data to MCMA API payload"""
         fuel = form_data.get('carburant', 'diesel').lower()
+        dates = _prep_dates(form_data)
 
         return {
-            "dateOfCirculation": format_date(form_data.get('date_mec'), "YYYY-MM-DD"),
+            "dateOfCirculation": dates['date_mec_ymd'],
             "horsePower": form_data.get('puissance_fiscale', 6),
             "fuel": FUEL_MAPPING['mcma'].get(fuel, 'Diesel'),
             "valueOfVehicle": int(form_data.get('valeur_actuelle', 150000)),
@@ -364,16 +396,18 @@ class FieldMapper:
         Returns:
             Provider-specific payload
         """
-        provider_lower = provider.lower()
-
-        if provider_lower == "sanlam":
-            return FieldMapper.map_to_sanlam(form_data)
-        elif provider_lower == "axa":
-            return FieldMapper.map_to_axa(form_data)
-        elif provider_lower == "rma":
-            return FieldMapper.map_to_rma(form_data)
-        elif provider_lower == "mcma":
-            return FieldMapper.map_to_mcma(form_data)
-        else:
+        mapper = _PROVIDER_MAPPERS.get(provider.lower())
+        if mapper is None:
             # Default fallback to form data
             return form_data
+        return mapper(form_data)
+
+
+# ============ PROVIDER DISPATCH ============
+# Built once at import so map_for_scraper is a single dict lookup per call
+_PROVIDER_MAPPERS = {
+    "sanlam": FieldMapper.map_to_sanlam,
+    "axa": FieldMapper.map_to_axa,
+    "rma": FieldMapper.map_to_rma,
+    "mcma": FieldMapper.map_to_mcma,
+}
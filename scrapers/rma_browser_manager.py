@@ -1,40 +1,177 @@
 """
-RMA Browser Manager - Single browser instance with request queue
-Handles browser lifecycle and sequential request processing
+RMA Browser Manager - Shared browser instances with request queue
+Runs an asyncio event loop in a background thread; several worker coroutines
+share the browsers, each scrape on its own page, so network waits overlap.
 """
 
+import asyncio
+import collections
+import itertools
+import os
 import threading
-import queue
+import time
 import logging
+from dataclasses import dataclass
 from typing import Dict, Any
 
+import orjson
+
+from .rma_scraper import (
+    FUEL_TYPE_MAPPING, _OFFERS_URL_SUBSTR, build_locators, extract_offers, fill_form,
+    filter_rma_response, fr_date, wait_for_settle
+)
+from .field_mapper import FieldMapper
+
 logger = logging.getLogger(__name__)
 
+# Number of scrapes that may run concurrently (one page each) across the browsers
+NUM_WORKERS = int(os.getenv('RMA_WORKERS', 2))
+
+# Camoufox browsers (each its own OS process); workers are spread across them
+NUM_BROWSERS = max(1, min(int(os.getenv('RMA_BROWSERS', 1)), NUM_WORKERS))
+
+# Seconds between checks for crashed browsers, which are then relaunched
+HEALTH_CHECK_INTERVAL = 30
+
+# Seconds a post-bootstrap storage_state snapshot (cookies, consent, session) is reused
+STORAGE_STATE_TTL = 6 * 3600
+
+# Cookie consent button on the form start page, clicked once when taking the snapshot
+CONSENT_BUTTON = "button:has-text('Accepter')"
+
+# Form start page; pooled pages sit here between scrapes
+SOUSCRIRE_URL = "https://direct.rmaassurance.com/souscrire"
+
+# A pooled page is replaced after this many scrapes to bound browser memory growth
+PAGE_MAX_USES = 50
+
+# Requests each worker may have waiting besides the one it is running; beyond
+# (QUEUE_DEPTH_PER_WORKER + 1) x NUM_WORKERS in total callers are turned away
+QUEUE_DEPTH_PER_WORKER = int(os.getenv('RMA_QUEUE_DEPTH', 2))
+
+
+# Params that must be present and non-empty after FieldMapper.map_to_rma
+_REQUIRED = ('nom', 'prenom', 'carburant', 'puissance_fiscale', 'date_mec',
+             'valeur_neuf', 'valeur_actuelle', 'nombre_places',
+             'date_naissance', 'telephone')
+
+
+@dataclass
+class RmaScrapeInput:
+    """RMA form values, formatted as typed into the form before the request is queued"""
+    nom: str
+    prenom: str
+    telephone: str
+    ville: str
+    birth_date: str
+    license_date: str
+    plate_display: str
+    immatriculation: str
+    puissance_fiscale: str
+    fuel_display: str
+    mec_date: str
+    valeur_neuf: Any
+    valeur_actuelle: Any
+    nombre_places: Any
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "RmaScrapeInput":
+        """Build from FieldMapper.map_to_rma output"""
+        return cls(
+            nom=params['nom'],
+            prenom=params['prenom'],
+            telephone=params['telephone'],
+            ville=params.get('ville', 'CASABLANCA'),
+            birth_date=fr_date(params.get('date_naissance', '')),
+            license_date=fr_date(params.get('date_permis', '')),
+            plate_display="Plaque standard",  # Always standard
+            immatriculation=params.get('immatriculation', ''),
+            puissance_fiscale=str(params['puissance_fiscale']),
+            fuel_display=FUEL_TYPE_MAPPING.get(params.get('carburant', 'diesel').lower(), 'DIESEL'),
+            mec_date=fr_date(params.get('date_mec', '')),
+            valeur_neuf=params['valeur_neuf'],
+            valeur_actuelle=params['valeur_actuelle'],
+            nombre_places=params['nombre_places'],
+        )
 
-class RMABrowserManager:
-    _instance = None
-    _lock = threading.Lock()
+    def form_values(self) -> Dict[str, Any]:
+        """The values under the keys rma_scraper.fill_form reads"""
+        return {
+            'nom': self.nom,
+            'prenom': self.prenom,
+            'ville': self.ville,
+            'telephone': self.telephone,
+            'date_naissance': self.birth_date,
+            'date_permis': self.license_date,
+            'plate_display': self.plate_display,
+            'immatriculation': self.immatriculation,
+            'puissance_fiscale': self.puissance_fiscale,
+            'fuel_display': self.fuel_display,
+            'date_mec': self.mec_date,
+            'valeur_neuf': self.valeur_neuf,
+            'valeur_actuelle': self.valeur_actuelle,
+            'nombre_places': self.nombre_places,
+        }
 
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+
+class _ResultSlot:
+    """Hand-off between a blocked caller thread and the worker that serves it"""
+    __slots__ = ("event", "result", "abandoned", "deadline")
 
     def __init__(self):
-        if self._initialized:
-            return
+        self.event = threading.Event()
+        self.result = None
+        self.abandoned = False
+        self.deadline = 0.0  # time.monotonic() after which the caller has given up
+
+
+class _DeadlineExceeded(Exception):
+    """The request's time budget ran out mid-scrape"""
+
+
+class _BrowserHandle:
+    """One Camoufox browser and its pool of warm pages (the loop-bound parts are set in start)"""
+    __slots__ = ("index", "num_pages", "browser", "cm", "lock", "generation", "page_pool",
+                 "storage_state", "state_taken_at")
+
+    def __init__(self, index: int, num_pages: int):
+        self.index = index
+        self.num_pages = num_pages  # one warm page per worker assigned to this browser
+        self.browser = None
+        self.cm = None
+        self.lock = None  # asyncio.Lock, created on the loop
+        self.generation = 0
+        self.page_pool = None  # asyncio.LifoQueue, created on the loop
+        self.storage_state = None  # cookies/localStorage after the SPA bootstrap
+        self.state_taken_at = 0.0
 
-        self._initialized = True
-        self._browser = None
-        self._page = None
-        self._browser_lock = threading.Lock()
 
-        # Request queue
-        self._request_queue = queue.Queue()
-        self._worker_thread = None
+class RMABrowserManager:
+    """One per process: use the module-level instance via get_rma_manager()"""
+
+    def __init__(self):
+        # Worker i uses browser i % NUM_BROWSERS
+        self._browsers = [
+            _BrowserHandle(i, len(range(i, NUM_WORKERS, NUM_BROWSERS))) for i in range(NUM_BROWSERS)
+        ]
+        self._monitor = None
+
+        # Warm pages, pre-navigated to SOUSCRIRE_URL: page -> [browser handle, generation, uses]
+        self._page_meta = {}
+        self._page_locators = {}  # page -> locators built once by build_locators
+
+        # Event loop thread, one request queue per worker (round-robin dispatch)
+        self._loop = None
+        self._loop_thread = None
+        self._queues = []
+        self._rr = itertools.count()
+        self._workers = []
+        self._in_flight = []  # per worker: the request taken off its queue, not yet answered
+        self._num_workers = NUM_WORKERS
+
+        # Recycled result slots; deque append/pop are atomic, so no extra lock
+        self._slot_pool = collections.deque(maxlen=2 * NUM_WORKERS)
+        self._lifecycle_lock = threading.Lock()
         self._running = False
 
         # Browser config
@@ -42,243 +179,352 @@ class RMABrowserManager:
             "headless": True,
             "humanize": True,
             "os": "linux",
-            "geoip": True
+            "geoip": True,
+            # Images are refused by a browser pref rather than a page.route handler:
+            # any route turns off the HTTP cache, and every goto reset of a pooled
+            # page would then download the JS bundle again
+            "block_images": True
         }
 
         logger.info("RMA Browser Manager initialized")
 
     def start(self):
-        """Start the queue worker thread"""
-        if self._running:
-            return
+        """Start the event loop thread and the queue workers"""
+        with self._lifecycle_lock:
+            if self._running:
+                return
 
-        self._running = True
-        self._worker_thread = threading.Thread(target=self._process_queue, daemon=True)
-        self._worker_thread.start()
-        logger.info("RMA queue worker started")
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+            self._loop_thread.start()
+            asyncio.run_coroutine_threadsafe(self._start_workers(), self._loop).result()
+
+            self._running = True
+            logger.info(f"RMA queue workers started ({self._num_workers})")
 
     def stop(self):
-        """Stop the worker and close browser"""
-        self._running = False
-        if self._worker_thread:
-            self._request_queue.put(None)  # Signal to stop
-            self._worker_thread.join(timeout=5)
+        """Stop the workers, close browser and the event loop"""
+        with self._lifecycle_lock:
+            if not self._running:
+                return
+
+            self._running = False
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+            except Exception as e:
+                logger.error(f"RMA shutdown error: {e}")
+
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+            if not self._loop_thread.is_alive():
+                self._loop.close()
+            logger.info("RMA Browser Manager stopped")
+
+    async def _start_workers(self):
+        """Create the queues and spawn the worker coroutines (runs on the loop)"""
+        for b in self._browsers:
+            b.lock = asyncio.Lock()
+            b.page_pool = asyncio.LifoQueue()
+        self._queues = [
+            asyncio.Queue(maxsize=QUEUE_DEPTH_PER_WORKER) for _ in range(self._num_workers)
+        ]
+        self._in_flight = [None] * self._num_workers
+        self._workers = [
+            asyncio.create_task(self._process_queue(i)) for i in range(self._num_workers)
+        ]
+        self._monitor = asyncio.create_task(self._monitor_browsers())
+
+    async def _shutdown(self):
+        """Cancel workers and close the browsers (runs on the loop)"""
+        tasks = self._workers + [self._monitor]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._monitor = None
+
+        # Release callers still waiting on queued or in-flight requests
+        pending = [item for item in self._in_flight if item is not None]
+        for request_queue in self._queues:
+            while not request_queue.empty():
+                pending.append(request_queue.get_nowait())
+        for _, slot in pending:
+            self._resolve(slot, {
+                "success": False,
+                "error": "RMA manager stopped",
+                "annual": [],
+                "semi_annual": []
+            })
+        self._in_flight = []
 
-        self._close_browser()
-        logger.info("RMA Browser Manager stopped")
+        for b in self._browsers:
+            await self._close_browser(b)
 
-    def _create_browser(self):
-        """Create browser if not exists"""
-        if self._browser is not None:
+    async def _create_browser(self, b: _BrowserHandle):
+        """Create browser and its warm page pool if not exists"""
+        async with b.lock:
+            if b.browser is not None:
+                return True
+
+            try:
+                from camoufox.async_api import AsyncCamoufox
+                b.cm = AsyncCamoufox(**self._browser_config)
+                b.browser = await b.cm.__aenter__()
+                b.generation += 1
+                logger.info(f"RMA browser {b.index} created")
+            except Exception as e:
+                logger.error(f"Failed to create browser {b.index}: {e}")
+                b.browser = None
+                b.cm = None
+                return False
+
+            await self._snapshot_state(b)
+
+            # Pre-navigate one page per worker so scrapes skip the initial page load;
+            # each worker takes one from the pool and keeps it
+            pages = await asyncio.gather(
+                *(self._new_page(b) for _ in range(b.num_pages)), return_exceptions=True
+            )
+            for page in pages:
+                if isinstance(page, Exception):
+                    logger.warning(f"Could not warm RMA page: {page}")
+                else:
+                    b.page_pool.put_nowait(page)
             return True
 
+    async def _close_browser(self, b: _BrowserHandle):
+        """Close browser (and every pooled page) if open"""
+        async with b.lock:
+            while not b.page_pool.empty():
+                b.page_pool.get_nowait()
+            for page in [p for p, meta in self._page_meta.items() if meta[0] is b]:
+                del self._page_meta[page]
+                self._page_locators.pop(page, None)
+
+            if b.cm:
+                try:
+                    await b.cm.__aexit__(None, None, None)
+                except:
+                    pass
+                b.browser = None
+                b.cm = None
+                b.storage_state = None
+                logger.info(f"RMA browser {b.index} closed")
+
+    async def _monitor_browsers(self):
+        """Relaunch browsers whose process died, so the next scrape doesn't pay for it"""
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            for b in self._browsers:
+                if b.browser is not None and not b.browser.is_connected():
+                    logger.warning(f"RMA browser {b.index} disconnected, restarting")
+                    await self._close_browser(b)
+                    await self._create_browser(b)
+
+    async def _snapshot_state(self, b: _BrowserHandle):
+        """
+        Load the form once, accept the cookie banner and keep the resulting storage_state,
+        so new pages start with the session the SPA would otherwise set up on every load.
+        """
+        context = None
         try:
-            from camoufox.sync_api import Camoufox
-            self._browser = Camoufox(**self._browser_config).__enter__()
-            logger.info("RMA browser created")
-            return True
+            context = await b.browser.new_context()
+            page = await context.new_page()
+            await page.goto(SOUSCRIRE_URL, timeout=60000)
+            await wait_for_settle(page)
+            try:
+                await page.locator(CONSENT_BUTTON).first.click(timeout=3000)
+            except Exception:
+                pass  # No banner (or already accepted)
+            b.storage_state = await context.storage_state()
+            b.state_taken_at = time.monotonic()
         except Exception as e:
-            logger.error(f"Failed to create browser: {e}")
-            self._browser = None
-            return False
-
-    def _close_browser(self):
-        """Close browser if open"""
-        with self._browser_lock:
-            if self._browser:
+            logger.warning(f"Could not snapshot RMA storage state: {e}")
+            b.storage_state = None
+        finally:
+            if context is not None:
                 try:
-                    self._browser.__exit__(None, None, None)
-                except:
+                    await context.close()
+                except Exception:
                     pass
-                self._browser = None
-                self._page = None
-                logger.info("RMA browser closed")
 
-    def _process_queue(self):
-        """Worker thread that processes requests one by one"""
-        while self._running:
+    async def _new_page(self, b: _BrowserHandle):
+        """Open a page in its own context seeded with the browser's storage_state snapshot"""
+        if b.storage_state is not None and time.monotonic() - b.state_taken_at > STORAGE_STATE_TTL:
+            await self._snapshot_state(b)
+        context = await b.browser.new_context(storage_state=b.storage_state)
+        page = await context.new_page()
+        self._page_meta[page] = [b, b.generation, 0]
+        self._page_locators[page] = build_locators(page)
+        await page.goto(SOUSCRIRE_URL, timeout=60000)
+        await wait_for_settle(page)
+        return page
+
+    async def _acquire_page(self, b: _BrowserHandle):
+        """Take a warm page from the browser's pool, creating the browser first if needed"""
+        if not await self._create_browser(b):
+            return None
+        if b.page_pool.empty() and b.browser is not None:
+            # Pool ran dry (warm-up failed): open one on demand
+            return await self._new_page(b)
+        return await b.page_pool.get()
+
+    async def _recycle_page(self, page, reusable: bool):
+        """
+        Reset a worker's page to the form start for its next request.
+        Returns the page to keep using, a replacement, or None to re-acquire from the pool.
+        """
+        b, generation, uses = self._page_meta.pop(page, (None, None, PAGE_MAX_USES))
+        locators = self._page_locators.pop(page, None)
+        uses += 1
+        current = b is not None and b.browser is not None and generation == b.generation
+
+        if current and reusable and uses < PAGE_MAX_USES and not page.is_closed():
             try:
-                item = self._request_queue.get(timeout=1)
+                await page.goto(SOUSCRIRE_URL, timeout=60000)
+                await wait_for_settle(page)
+                self._page_meta[page] = [b, generation, uses]
+                self._page_locators[page] = locators or build_locators(page)
+                return page
+            except Exception as e:
+                logger.warning(f"Could not reset RMA page: {e}")
 
-                if item is None:
-                    break
+        try:
+            # Each page owns its context; closing the context closes the page
+            await page.context.close()
+        except:
+            pass
 
-                params, result_holder, done_event = item
+        # Pages from a closed browser are dropped; the new browser has its own pool
+        if current:
+            try:
+                return await self._new_page(b)
+            except Exception as e:
+                logger.warning(f"Could not replace RMA page: {e}")
+        return None
+
+    async def _process_queue(self, worker_id: int):
+        """Worker coroutine that only serves its own queue, on its own page"""
+        request_queue = self._queues[worker_id]
+        browser = self._browsers[worker_id % len(self._browsers)]
+        page = None
+
+        while True:
+            # Taken one at a time: waiting requests stay in the bounded queue, so the
+            # QUEUE_DEPTH_PER_WORKER cap keeps turning callers away when it is full
+            item = self._in_flight[worker_id] = await request_queue.get()
+            form, slot = item
+            request_queue.task_done()
+
+            # The caller already timed out (or is about to); don't spend a scrape on it
+            if slot.abandoned or time.monotonic() >= slot.deadline:
+                self._resolve(slot, {
+                    "success": False,
+                    "error": "deadline exceeded",
+                    "annual": [],
+                    "semi_annual": []
+                })
+                self._in_flight[worker_id] = None
+                continue
 
-                try:
-                    with self._browser_lock:
-                        result = self._execute_scrape(params)
-                        result_holder['result'] = result
-                except Exception as e:
-                    logger.error(f"Scrape error: {e}")
-                    result_holder['result'] = {
+            try:
+                if page is None:
+                    page = await self._acquire_page(browser)
+                if page is None:
+                    result = {
                         "success": False,
-                        "error": str(e),
+                        "error": "Failed to create browser",
                         "annual": [],
                         "semi_annual": []
                     }
-                finally:
-                    done_event.set()
-                    self._request_queue.task_done()
-
-            except queue.Empty:
-                continue
+                else:
+                    result = await self._execute_scrape(browser, page, form, slot.deadline)
             except Exception as e:
-                logger.error(f"Queue worker error: {e}")
-
-    def _execute_scrape(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the actual scraping (called within browser lock)"""
-        from .rma_scraper import (
-            FUEL_TYPE_MAPPING, random_sleep, fill_text_input, fill_mui_dropdown
-        )
-
-        # Ensure browser exists
-        if not self._create_browser():
-            return {
-                "success": False,
-                "error": "Failed to create browser",
-                "annual": [],
-                "semi_annual": []
-            }
+                logger.error(f"Scrape error (worker {worker_id}): {e}")
+                result = {
+                    "success": False,
+                    "error": str(e),
+                    "annual": [],
+                    "semi_annual": []
+                }
+
+            self._resolve(slot, result)
+            self._in_flight[worker_id] = None
+
+            # Reset the page after answering so the caller doesn't wait on it
+            if page is not None:
+                page = await self._recycle_page(page, reusable=result.get("success", False))
+
+    async def _execute_scrape(self, b: _BrowserHandle, page, form: RmaScrapeInput,
+                              deadline: float) -> Dict[str, Any]:
+        """
+        Execute the actual scraping on a pooled page already on the form start page.
+        Every wait, click and fill is capped by what is left of the caller's deadline.
+        """
+        locs = self._page_locators.get(page) or build_locators(page)
 
-        captured_responses = []
-
-        def capture_response(response):
-            try:
-                if "/offer/api/offers" in response.url and response.status == 200:
-                    try:
-                        response_json = response.json()
-                        captured_responses.append(response_json)
-                    except:
-                        pass
-            except:
-                pass
+        def budget(cap_ms: int) -> int:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                raise _DeadlineExceeded()
+            return min(cap_ms, remaining_ms)
 
         try:
-            page = self._browser.new_page()
-            page.on("response", capture_response)
-
-            # Get mapped values (already mapped by FieldMapper)
-            fuel_code = params.get('carburant', 'diesel').lower()
-            fuel_display = FUEL_TYPE_MAPPING.get(fuel_code, 'DIESEL')
-            plate_display = "Plaque standard"  # Always standard
-            immatriculation = params.get('immatriculation', '')
+            # Step 1
+            await locs["suivant"].first.click(timeout=budget(30000))
 
-            # Navigate
-            page.goto("https://direct.rmaassurance.com/souscrire", timeout=60000)
-            random_sleep(1000, 2000)
+            # The step-2 form is ready once its first field is visible
+            await locs["last_name"].wait_for(state="visible", timeout=budget(20000))
 
-            # Step 1
-            page.locator("button:has-text('Suivant')").first.click()
-            random_sleep(1000, 2000)
-
-            name_input = page.locator('input[name="subscriber.lastName"]')
-            name_input.wait_for(state="visible", timeout=20000)
-            random_sleep(1000, 2000)
-
-            # Fill personal info
-            fill_text_input(page, 'input[name="subscriber.lastName"]', params['nom'], "Last Name")
-            fill_text_input(page, 'input[name="subscriber.firstName"]', params['prenom'], "First Name")
-            fill_mui_dropdown(page, "Ville", params.get('ville', 'CASABLANCA'), "City")
-            fill_text_input(page, 'input[name="subscriber.phone"]', params['telephone'], "Phone")
-
-            # Format dates
-            birth_date = params.get('date_naissance', '')
-            if birth_date and len(birth_date) == 10:
-                birth_date_formatted = f"{birth_date[8:10]}/{birth_date[5:7]}/{birth_date[0:4]}"
-            else:
-                birth_date_formatted = birth_date
-
-            license_date = params.get('date_permis', '')
-            if license_date and len(license_date) == 10:
-                license_date_formatted = f"{license_date[8:10]}/{license_date[5:7]}/{license_date[0:4]}"
-            else:
-                license_date_formatted = license_date
-
-            fill_text_input(page, 'input[placeholder="JJ/MM/AAAA"]', birth_date_formatted, "Birth Date", index=0)
-            fill_text_input(page, 'input[placeholder="JJ/MM/AAAA"]', license_date_formatted, "License Date", index=1)
-
-            # Scroll to vehicle section
-            page.mouse.wheel(0, 600)
-            random_sleep(1000, 1500)
-
-            # Fill vehicle info
-            fill_mui_dropdown(page, "Type de plaque", plate_display, "Plate Type")
-            fill_text_input(page, 'input[name="vehicleInformations.plateNumber"]', immatriculation, "Registration")
-            fill_mui_dropdown(page, "Puissance fiscale", str(params['puissance_fiscale']), "Fiscal Power")
-            fill_mui_dropdown(page, "Combustible", fuel_display, "Fuel Type")
-
-            mec_date = params.get('date_mec', '')
-            if mec_date and len(mec_date) == 10:
-                mec_date_formatted = f"{mec_date[8:10]}/{mec_date[5:7]}/{mec_date[0:4]}"
-            else:
-                mec_date_formatted = mec_date
-
-            fill_text_input(page, 'input[placeholder="JJ/MM/AAAA"]', mec_date_formatted, "Vehicle Date", index=2)
-            fill_text_input(page, 'input[name="vehicleInformations.newPrice"]', params['valeur_neuf'], "New Value")
-            fill_text_input(page, 'input[name="vehicleInformations.marketPrice"]', params['valeur_actuelle'], "Market Value")
-            fill_text_input(page, 'input[name="vehicleInformations.placesNumber"]', params['nombre_places'], "Number of Seats")
+            await fill_form(page, form.form_values(), locs, budget)
 
             # Submit
             annual_response = None
             semi_annual_response = None
 
-            with page.expect_response(lambda r: "/offer/api/offers" in r.url and r.status == 200, timeout=30000) as resp_promise:
-                page.locator("button:has-text('Suivant')").last.click()
-                random_sleep(2000, 3000)
+            async with page.expect_response(lambda r: _OFFERS_URL_SUBSTR in r.url and r.status == 200, timeout=budget(30000)) as resp_promise:
+                await locs["suivant"].last.click(timeout=budget(30000))
 
-            response = resp_promise.value
-            annual_response = response.json()
-            random_sleep(1000, 1500)
+            response = await resp_promise.value
+            annual_response = extract_offers(orjson.loads(await response.body()))
 
             # Click 6 months
             try:
-                six_months_label = page.locator("label[for='6 mois']")
-                six_months_label.wait_for(state="visible", timeout=20000)
+                six_months_label = locs["six_months"]
+                await six_months_label.wait_for(state="visible", timeout=budget(20000))
 
-                with page.expect_response(
-                    lambda r: "/offer/api/offers" in r.url and r.status == 200,
-                    timeout=20000
+                async with page.expect_response(
+                    lambda r: _OFFERS_URL_SUBSTR in r.url and r.status == 200,
+                    timeout=budget(20000)
                 ) as response_promise:
-                    six_months_label.click()
-                    random_sleep(2000, 2500)
+                    await six_months_label.click(timeout=budget(20000))
 
-                response_6m = response_promise.value
-                semi_annual_response = response_6m.json()
+                response_6m = await response_promise.value
+                semi_annual_response = extract_offers(orjson.loads(await response_6m.body()))
 
             except Exception as e:
                 logger.warning(f"6-month capture failed: {e}")
                 semi_annual_response = None
 
-            # Process responses
-            try:
-                if captured_responses and len(captured_responses) > 0:
-                    annual_data = captured_responses[0]
-                    if isinstance(annual_data, dict) and "offers" in annual_data:
-                        annual_response = annual_data["offers"]
-            except:
-                pass
-
-            try:
-                if captured_responses and len(captured_responses) > 1:
-                    semi_annual_data = captured_responses[1]
-                    if isinstance(semi_annual_data, dict) and "offers" in semi_annual_data:
-                        semi_annual_response = semi_annual_data["offers"]
-            except:
-                pass
-
-            page.close()
-
             return {
                 "success": annual_response is not None,
                 "annual": annual_response or [],
                 "semi_annual": semi_annual_response or []
             }
 
+        except _DeadlineExceeded:
+            logger.warning("RMA scrape ran past its deadline")
+            return {
+                "success": False,
+                "error": "deadline exceeded",
+                "annual": [],
+                "semi_annual": []
+            }
         except Exception as e:
             logger.error(f"Scrape execution error: {e}")
-            # On error, close browser to get fresh one next time
-            self._close_browser()
+            # Other scrapes share the browser: only replace it if it died
+            if b.browser is not None and not b.browser.is_connected():
+                await self._close_browser(b)
             return {
                 "success": False,
                 "error": str(e),
@@ -286,33 +532,79 @@ class RMABrowserManager:
                 "semi_annual": []
             }
 
-    def scrape(self, params: Dict[str, Any], timeout: int = 120) -> Dict[str, Any]:
+    @staticmethod
+    def _resolve(slot: _ResultSlot, result: Dict[str, Any]):
+        """Publish a result and wake the waiting caller"""
+        slot.result = result
+        slot.event.set()
+
+    def _enqueue(self, form: RmaScrapeInput, slot: _ResultSlot):
+        """Queue a request on a worker (runs on the loop, via call_soon_threadsafe)"""
+        start = next(self._rr)
+
+        # Round-robin, skipping workers whose queue is full; reject when all are
+        for offset in range(self._num_workers):
+            request_queue = self._queues[(start + offset) % self._num_workers]
+            try:
+                request_queue.put_nowait((form, slot))
+                logger.info(f"Request queued. Queue size: {request_queue.qsize()}")
+                return
+            except asyncio.QueueFull:
+                continue
+
+        logger.warning("RMA queues full, rejecting request")
+        self._resolve(slot, {
+            "success": False,
+            "error": "Server busy, retry shortly",
+            "annual": [],
+            "semi_annual": []
+        })
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Queue depth per worker, for the RMA queue health endpoint.
+        queued/queue_capacity count waiting requests only; in_flight/capacity add the
+        one each worker is running, capacity being where callers start being turned away.
+        """
+        depths = [q.qsize() for q in self._queues]
+        return {
+            "running": self._running,
+            "workers": self._num_workers,
+            "queue_depth": depths,
+            "queued": sum(depths),
+            "queue_capacity": QUEUE_DEPTH_PER_WORKER * self._num_workers,
+            "in_flight": sum(item is not None for item in self._in_flight),
+            "capacity": (QUEUE_DEPTH_PER_WORKER + 1) * self._num_workers,
+            "browsers_open": sum(b.browser is not None for b in self._browsers),
+        }
+
+    def scrape(self, form: RmaScrapeInput, timeout: int = 120) -> Dict[str, Any]:
         """
         Add scrape request to queue and wait for result
 
         Args:
-            params: Scraping parameters
+            form: Pre-formatted form values
             timeout: Max wait time in seconds
 
         Returns:
             Scraping result
         """
-        # Start worker if not running
+        # Start workers if not running
         if not self._running:
             self.start()
 
-        # Create result holder and event
-        result_holder = {'result': None}
-        done_event = threading.Event()
+        try:
+            slot = self._slot_pool.pop()
+        except IndexError:
+            slot = _ResultSlot()
+        slot.deadline = time.monotonic() + timeout
 
-        # Add to queue
-        self._request_queue.put((params, result_holder, done_event))
-        logger.info(f"Request queued. Queue size: {self._request_queue.qsize()}")
+        # Hand the request to the event loop and block this (Flask) thread on it
+        self._loop.call_soon_threadsafe(self._enqueue, form, slot)
 
-        # Wait for result
-        if done_event.wait(timeout=timeout):
-            return result_holder['result']
-        else:
+        if not slot.event.wait(timeout):
+            # A worker may still write to this slot, so it is not recycled
+            slot.abandoned = True
             return {
                 "success": False,
                 "error": "Request timeout",
@@ -320,16 +612,19 @@ class RMABrowserManager:
                 "semi_annual": []
             }
 
+        result = slot.result
+        slot.result = None
+        slot.event.clear()
+        self._slot_pool.append(slot)
+        return result
 
-# Global manager instance
-_manager = None
+
+# Global manager instance; cheap to build, the browser only starts on first scrape
+_manager = RMABrowserManager()
 
 
 def get_rma_manager() -> RMABrowserManager:
     """Get the global RMA browser manager instance"""
-    global _manager
-    if _manager is None:
-        _manager = RMABrowserManager()
     return _manager
 
 
@@ -338,20 +633,13 @@ def scrape_rma_queued(params: Dict[str, Any]) -> Dict[str, Any]:
     Scrape RMA using the browser manager with queue
 
     This is the main function to call from the website.
-    It uses a single browser instance and processes requests one by one.
+    It uses RMA_BROWSERS browser instances shared by a few concurrent worker pages.
     """
-    from .rma_scraper import filter_rma_response
-    from .field_mapper import FieldMapper
-
     # Map form data to RMA params (handles dummy phone, plate, etc.)
     rma_params = FieldMapper.map_to_rma(params)
 
     # Validate required parameters after mapping
-    required_fields = ['nom', 'prenom', 'carburant', 'puissance_fiscale', 'date_mec',
-                      'valeur_neuf', 'valeur_actuelle', 'nombre_places',
-                      'date_naissance', 'telephone']
-
-    missing_fields = [f for f in required_fields if f not in rma_params or not rma_params[f]]
+    missing_fields = [f for f in _REQUIRED if not rma_params.get(f)]
     if missing_fields:
         return {
             "success": False,
@@ -360,16 +648,19 @@ def scrape_rma_queued(params: Dict[str, Any]) -> Dict[str, Any]:
             "semi_annual": []
         }
 
+    # All string formatting happens here, so workers only drive the page
     manager = get_rma_manager()
-    result = manager.scrape(rma_params)
+    result = manager.scrape(RmaScrapeInput.from_params(rma_params))
 
     # Apply filter to return only needed data
     return filter_rma_response(result)
 
 
+def get_rma_queue_stats() -> Dict[str, Any]:
+    """Current RMA queue depth (does not start the manager)"""
+    return get_rma_manager().get_stats()
+
+
 def shutdown_rma_manager():
     """Shutdown the browser manager (call on app shutdown)"""
-    global _manager
-    if _manager:
-        _manager.stop()
-        _manager = None
+    _manager.stop()
@@ -4,13 +4,16 @@ Fetches quotations from RMA Direct website using browser automation
 Integrates with main website form data
 """
 
-import time
+import asyncio
+import contextlib
 import random
-import json
+import time
 import logging
 from datetime import datetime
 from typing import Dict, Any
-from camoufox.sync_api import Camoufox
+import orjson
+from camoufox.async_api import AsyncCamoufox
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,90 +44,206 @@ RMA_PLATE_TYPE_MAPPING = {
     "ww": "WW"
 }
 
-# Store responses for analysis
-captured_responses = []
+# Alphabet for generated dummy plates
+_DIGITS = "0123456789"
+
+# Quotation API endpoint (both the 12- and 6-month offers come from it)
+_OFFERS_URL_SUBSTR = "/offer/api/offers"
+
+
+def fr_date(d: str) -> str:
+    """YYYY-MM-DD -> JJ/MM/AAAA as typed into the RMA form; anything else is passed through"""
+    return f"{d[8:10]}/{d[5:7]}/{d[0:4]}" if d and len(d) == 10 and d[4] == '-' else (d or '')
+
+
+def _dummy_plate() -> str:
+    """Random plate: 5 digits - F/A - 2 digits (e.g. 00012-F-34)"""
+    return f"{''.join(random.choices(_DIGITS, k=5))}-{random.choice('FA')}-{''.join(random.choices(_DIGITS, k=2))}"
+
+
+# ============ FORM HELPERS (async Playwright pages) ============
+async def random_sleep_async(min_ms=500, max_ms=1500):
+    """Add human-like random delay without blocking the event loop"""
+    await asyncio.sleep(random.uniform(min_ms, max_ms) / 1000)
+
+
+async def wait_for_settle(page, timeout=5000):
+    """Wait for the page's network to go idle; a page that keeps polling just moves on"""
+    try:
+        await page.wait_for_load_state("networkidle", timeout=timeout)
+    except Exception:
+        pass
+
 
+def _step_timeouts(timeout):
+    """
+    Per-step timeout (ms) for a helper whose steps share one overall budget of
+    timeout ms; with timeout=None each step keeps its own cap.
+    """
+    if timeout is None:
+        return lambda cap: cap
+    end = time.monotonic() + timeout / 1000
 
-def random_sleep(min_ms=500, max_ms=1500):
-    """Add human-like random delay"""
-    time.sleep(random.uniform(min_ms, max_ms) / 1000)
+    # Never 0: Playwright reads timeout=0 as "no timeout"
+    return lambda cap: max(1, min(cap, int((end - time.monotonic()) * 1000)))
 
 
-def fill_text_input(page, input_selector, value, label="", index=None):
+async def fill_text_input_async(page, input_field, value, label="", timeout=None):
     """Fill a text input field
     
     Args:
         page: Playwright page object
-        input_selector: CSS selector for input
+        input_field: Locator for the input
         value: Value to fill
         label: Label for logging
-        index: If multiple elements match, use this index (nth)
+        timeout: Overall time limit in ms (default: 5 s to appear, 30 s to fill)
     """
     if not value:
         return
-    
+
+    step = _step_timeouts(timeout)
     try:
-        input_field = page.locator(input_selector)
-        
-        # If index is specified (for multiple matching elements like date fields)
-        if index is not None:
-            input_field = input_field.nth(index)
-        
-        input_field.wait_for(state="visible", timeout=5000)
-        input_field.fill(str(value))
-        logger.info(f"Filled {label or input_selector}: {value}")
+        await input_field.wait_for(state="visible", timeout=step(5000))
+        await input_field.fill(str(value), timeout=step(30000))
+        logger.info(f"Filled {label}: {value}")
     except Exception as e:
-        logger.warning(f"Could not fill {label or input_selector}: {e}")
+        logger.warning(f"Could not fill {label}: {e}")
 
 
-def fill_mui_dropdown(page, label_text, value, debug_label=""):
+async def fill_mui_dropdown_async(page, dropdown_input, value, debug_label="", timeout=None,
+                                  state="visible"):
     """
-    Handles MUI dropdowns by clicking the input via its label and selecting an option.
+    Handles MUI dropdowns by clicking the dropdown input (a Locator, see
+    build_locators) and selecting the option matching value.
+    timeout (ms), if given, bounds the whole selection; state is what the input
+    is waited for before the click ("attached" lets click() do the actionability wait).
     """
     if not value:
         return
-    
-    print(f"Selecting {debug_label or label_text}: {value}...")
+
+    step = _step_timeouts(timeout)
     try:
-        # Use fuzzy text matching for the label
-        dropdown_input = page.locator(f"div.direct-MuiAutocomplete-root:has(label:has-text('{label_text}')) input")
-        dropdown_input.wait_for(state="visible", timeout=10000)
-        
-        dropdown_input.click()
-        random_sleep(300, 600)
-        dropdown_input.fill(value)
-        
-        # Wait for the listbox to appear
-        page.wait_for_selector("ul[role='listbox']", timeout=5000)
-        random_sleep(500, 800)
-        
-        # Find the exact matching option in the listbox
+        await dropdown_input.wait_for(state=state, timeout=step(10000))
+
+        await dropdown_input.click(timeout=step(30000))
+        await dropdown_input.fill(value, timeout=step(30000))
+
+        # Wait for the filtered options to render instead of sleeping
         listbox_options = page.locator("ul[role='listbox'] li[role='option']")
-        option_count = listbox_options.count()
-        
-        # Try to find the exact matching option
-        found = False
-        for i in range(option_count):
-            option_text = listbox_options.nth(i).inner_text().strip()
-            if value.upper() in option_text.upper():
-                print(f"Found matching option: {option_text}")
-                listbox_options.nth(i).click()
-                found = True
-                break
-        
+        await listbox_options.first.wait_for(state="visible", timeout=step(5000))
+
+        # Let the browser find the matching option (case-insensitive substring)
+        # in one query instead of reading every option's text
+        option = listbox_options.filter(has_text=value).first
+        try:
+            await option.click(timeout=step(2000))
+            found = True
+        except PlaywrightTimeoutError:
+            found = False
+
         if not found:
             # Fallback: select first option if exact match not found
-            print(f"Exact match not found for '{value}', selecting first option")
-            page.keyboard.press("ArrowDown")
-            page.keyboard.press("Enter")
-        
-        random_sleep(800, 1200)
-        logger.info(f"Dropdown {debug_label or label_text} selected: {value}")
+            logger.info(f"Exact match not found for '{value}', selecting first option")
+            await page.keyboard.press("ArrowDown")
+            await page.keyboard.press("Enter")
+
+        # The listbox closes once the selection is committed
+        await page.locator("ul[role='listbox']").wait_for(state="hidden", timeout=step(5000))
+        logger.info(f"Dropdown {debug_label} selected: {value}")
     except Exception as e:
-        logger.warning(f"Could not select {debug_label or label_text}: {e}")
+        logger.warning(f"Could not select {debug_label}: {e}")
 
 
-def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
+def build_locators(page) -> Dict[str, Any]:
+    """Locators for every form element a scrape touches; they stay valid across goto resets"""
+    date_inputs = page.locator('input[placeholder="JJ/MM/AAAA"]')
+
+    def dropdown(label_text):
+        return page.locator(f"div.direct-MuiAutocomplete-root:has(label:has-text('{label_text}')) input")
+
+    return {
+        "suivant": page.locator("button:has-text('Suivant')"),
+        "last_name": page.locator('input[name="subscriber.lastName"]'),
+        "first_name": page.locator('input[name="subscriber.firstName"]'),
+        "phone": page.locator('input[name="subscriber.phone"]'),
+        "birth_date": date_inputs.nth(0),
+        "license_date": date_inputs.nth(1),
+        "mec_date": date_inputs.nth(2),
+        "city": dropdown("Ville"),
+        "plate_type": dropdown("Type de plaque"),
+        "fiscal_power": dropdown("Puissance fiscale"),
+        "fuel": dropdown("Combustible"),
+        "plate_number": page.locator('input[name="vehicleInformations.plateNumber"]'),
+        "new_price": page.locator('input[name="vehicleInformations.newPrice"]'),
+        "market_price": page.locator('input[name="vehicleInformations.marketPrice"]'),
+        "seats": page.locator('input[name="vehicleInformations.placesNumber"]'),
+        "six_months": page.locator("label[for='6 mois']"),
+    }
+
+
+def extract_offers(data):
+    """Pull the offers list out of an /offer/api/offers payload"""
+    if isinstance(data, dict) and "offers" in data:
+        return data["offers"]
+    return data
+
+
+async def fill_form(page, params: Dict[str, Any], locs: Dict[str, Any] = None, budget=None):
+    """
+    Fill the RMA personal and vehicle sections (page already on step 2).
+
+    Args:
+        page: Async Playwright page
+        params: Form values, with fuel_display, plate_display and immatriculation
+            already resolved and dates already in JJ/MM/AAAA
+        locs: Locators from build_locators(page); built here if not given
+        budget: Optional callable mapping a step's cap (ms) to the timeout it may use,
+            raising once time is up; without it each step keeps its own caps
+    """
+    locs = locs or build_locators(page)
+
+    def limit(cap_ms):
+        return budget(cap_ms) if budget is not None else None
+
+    # --- Step 2: Fill Personal Information ---
+    # One field at a time: fill() types into whichever element has focus
+    logger.info("Filling personal information...")
+
+    await fill_text_input_async(page, locs["last_name"], params['nom'], "Last Name", timeout=limit(10000))
+    await fill_text_input_async(page, locs["first_name"], params['prenom'], "First Name", timeout=limit(10000))
+    await fill_mui_dropdown_async(page, locs["city"], params.get('ville', 'CASABLANCA'), "City", timeout=limit(20000))
+    await fill_text_input_async(page, locs["phone"], params['telephone'], "Phone", timeout=limit(10000))
+
+    await fill_text_input_async(page, locs["birth_date"], params['date_naissance'], "Birth Date", timeout=limit(10000))
+    await fill_text_input_async(page, locs["license_date"], params['date_permis'], "License Date", timeout=limit(10000))
+
+    # --- Step 3: Scroll to Vehicle Section ---
+    logger.info("Scrolling to vehicle information section...")
+    scroll_timeout = limit(5000) or 5000
+    try:
+        await locs["plate_type"].scroll_into_view_if_needed(timeout=scroll_timeout)
+    except Exception as e:
+        logger.warning(f"Could not scroll to vehicle section: {e}")
+
+    # --- Step 4: Fill Vehicle Information ---
+    logger.info("Filling vehicle information...")
+
+    # The plate number input follows the plate type
+    await fill_mui_dropdown_async(page, locs["plate_type"], params['plate_display'], "Plate Type", timeout=limit(20000))
+    await fill_text_input_async(page, locs["plate_number"], params['immatriculation'], "Registration", timeout=limit(10000))
+
+    await fill_mui_dropdown_async(page, locs["fiscal_power"], str(params['puissance_fiscale']), "Fiscal Power", timeout=limit(20000))
+    await fill_mui_dropdown_async(page, locs["fuel"], params['fuel_display'], "Fuel Type", timeout=limit(20000))
+
+    await fill_text_input_async(page, locs["mec_date"], params['date_mec'], "Vehicle Date", timeout=limit(10000))
+
+    # Prices and seats
+    await fill_text_input_async(page, locs["new_price"], params['valeur_neuf'], "New Value", timeout=limit(10000))
+    await fill_text_input_async(page, locs["market_price"], params['valeur_actuelle'], "Market Value", timeout=limit(10000))
+    await fill_text_input_async(page, locs["seats"], params['nombre_places'], "Number of Seats", timeout=limit(10000))
+
+
+async def scrape_rma_async(params: Dict[str, Any], browser=None) -> Dict[str, Any]:
     """
     Main RMA scraper function - Called from website
     
@@ -143,6 +262,9 @@ def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
             - date_naissance: Birth date (YYYY-MM-DD)
             - telephone: Phone number
             - ville: City name
+        browser: Optional already-running Camoufox browser to reuse. The scrape
+            runs in its own context, which is closed afterwards; the browser is
+            left open. When omitted a browser is started and closed for this call.
     
     Returns:
         Dictionary with quotation data or error message
@@ -172,11 +294,18 @@ def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
     # Use provided immatriculation or generate dummy
     immatriculation = params.get('immatriculation', '')
     if not immatriculation:
-        # Generate dummy plate: 5 digits - F/A - 2 digits
-        five_digits = "".join(random.choices('0123456789', k=5))
-        letter = random.choice(['F', 'A'])
-        two_digits = "".join(random.choices('0123456789', k=2))
-        immatriculation = f"{five_digits}-{letter}-{two_digits}"
+        immatriculation = _dummy_plate()
+
+    form_values = {
+        **params,
+        "fuel_display": fuel_display,
+        "plate_display": plate_display,
+        "immatriculation": immatriculation,
+        # Dates: Convert YYYY-MM-DD to JJ/MM/AAAA
+        "date_naissance": fr_date(params.get('date_naissance', '')),
+        "date_permis": fr_date(params.get('date_permis', '')),
+        "date_mec": fr_date(params.get('date_mec', '')),
+    }
     
     browser_config = {
         "headless": True,
@@ -188,163 +317,74 @@ def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
     try:
         logger.info(f"Starting RMA scraper for {params.get('nom')} {params.get('prenom')}")
         
-        # Store both requests and responses for analysis
-        captured_responses = []
-        
-        def capture_response(response):
-            """Capture API responses"""
-            try:
-                if "/offer/api/offers" in response.url and response.status == 200:
-                    try:
-                        response_json = response.json()
-                        captured_responses.append(response_json)
-                        logger.info(f"Captured API response - Total: {len(captured_responses)}")
-                    except:
-                        pass
-            except Exception as e:
-                logger.debug(f"Error capturing response: {e}")
-        
-        with Camoufox(**browser_config) as browser:
-            page = browser.new_page()
-            page.on("response", capture_response)
+        async with contextlib.AsyncExitStack() as stack:
+            if browser is None:
+                browser = await stack.enter_async_context(AsyncCamoufox(**browser_config))
+            # Fresh context per scrape: no cookies or state leak between quotes
+            context = await browser.new_context()
+            stack.push_async_callback(context.close)
+            page = await context.new_page()
+            locs = build_locators(page)
 
             try:
                 # Navigate to RMA Direct
                 logger.info("Navigating to RMA Assurance...")
-                page.goto("https://direct.rmaassurance.com/souscrire", timeout=60000)
-                random_sleep(1000, 2000)
+                await page.goto("https://direct.rmaassurance.com/souscrire", wait_until="domcontentloaded", timeout=60000)
+                await wait_for_settle(page)
 
                 # Step 1: Click 'Suivant' to reach the main form
                 logger.info("Clicking first 'Suivant'...")
-                page.locator("button:has-text('Suivant')").first.click()
-                random_sleep(1000, 2000)
-                
+                await locs["suivant"].first.click()
+
                 # Wait for form to load
-                name_input = page.locator('input[name="subscriber.lastName"]')
-                name_input.wait_for(state="visible", timeout=20000)
-                random_sleep(1000, 2000)
+                await locs["last_name"].wait_for(state="visible", timeout=20000)
+                await random_sleep_async(100, 300)
 
-                # --- Step 2: Fill Personal Information ---
-                logger.info("Filling personal information...")
-                
-                fill_text_input(page, 'input[name="subscriber.lastName"]', params['nom'], "Last Name")
-                fill_text_input(page, 'input[name="subscriber.firstName"]', params['prenom'], "First Name")
-                fill_mui_dropdown(page, "Ville", params.get('ville', 'CASABLANCA'), "City")
-                fill_text_input(page, 'input[name="subscriber.phone"]', params['telephone'], "Phone")
-
-                # Dates: Convert YYYY-MM-DD to JJ/MM/AAAA
-                birth_date = params.get('date_naissance', '')
-                if birth_date and len(birth_date) == 10:  # YYYY-MM-DD format
-                    birth_date_formatted = f"{birth_date[8:10]}/{birth_date[5:7]}/{birth_date[0:4]}"
-                else:
-                    birth_date_formatted = birth_date
-
-                # License date field (using placeholder matching with index)
-                license_date = params.get('date_permis', '')
-                if license_date and len(license_date) == 10:
-                    license_date_formatted = f"{license_date[8:10]}/{license_date[5:7]}/{license_date[0:4]}"
-                else:
-                    license_date_formatted = license_date
-
-                # Fill birth date (nth:0)
-                fill_text_input(page, 'input[placeholder="JJ/MM/AAAA"]', birth_date_formatted, "Birth Date", index=0)
-                # Fill license date (nth:1)
-                fill_text_input(page, 'input[placeholder="JJ/MM/AAAA"]', license_date_formatted, "License Date", index=1)
-
-                # --- Step 3: Scroll to Vehicle Section ---
-                logger.info("Scrolling to vehicle information section...")
-                page.mouse.wheel(0, 600)
-                random_sleep(1000, 1500)
-
-                # --- Step 4: Fill Vehicle Information ---
-                logger.info("Filling vehicle information...")
-                
-                fill_mui_dropdown(page, "Type de plaque", plate_display, "Plate Type")
-                fill_text_input(page, 'input[name="vehicleInformations.plateNumber"]', immatriculation, "Registration")
-                
-                fill_mui_dropdown(page, "Puissance fiscale", str(params['puissance_fiscale']), "Fiscal Power")
-                fill_mui_dropdown(page, "Combustible", fuel_display, "Fuel Type")
-                
-                # Vehicle circulation date (nth:2)
-                mec_date = params.get('date_mec', '')
-                if mec_date and len(mec_date) == 10:
-                    mec_date_formatted = f"{mec_date[8:10]}/{mec_date[5:7]}/{mec_date[0:4]}"
-                else:
-                    mec_date_formatted = mec_date
-                
-                fill_text_input(page, 'input[placeholder="JJ/MM/AAAA"]', mec_date_formatted, "Vehicle Date", index=2)
-                
-                # Prices and seats
-                fill_text_input(page, 'input[name="vehicleInformations.newPrice"]', params['valeur_neuf'], "New Value")
-                fill_text_input(page, 'input[name="vehicleInformations.marketPrice"]', params['valeur_actuelle'], "Market Value")
-                fill_text_input(page, 'input[name="vehicleInformations.placesNumber"]', params['nombre_places'], "Number of Seats")
+                await fill_form(page, form_values, locs)
 
                 # --- Step 5: Submit & Capture Response ---
                 logger.info("Submitting form...")
                 
                 annual_response = None
                 semi_annual_response = None
-                
+
                 # Wait for first response (12 months)
-                with page.expect_response(lambda r: "/offer/api/offers" in r.url and r.status == 200, timeout=30000) as resp_promise:
-                    page.locator("button:has-text('Suivant')").last.click()
-                    random_sleep(2000, 3000)
+                async with page.expect_response(lambda r: _OFFERS_URL_SUBSTR in r.url and r.status == 200, timeout=30000) as resp_promise:
+                    await locs["suivant"].last.click()
 
-                response = resp_promise.value
-                annual_response = response.json()
-                logger.info("Captured 12-month quotation")
-                random_sleep(1000, 1500)
+                response = await resp_promise.value
+                annual_response = extract_offers(orjson.loads(await response.body()))
+                logger.info(f"Captured 12-month quotation: {len(annual_response or [])} packages")
 
                 # --- Step 6: Click 6 months radio button ---
+                # The 6-month option only exists on the 12-month results page, so this
+                # step follows the annual response on the same page
                 logger.info("Clicking 6 months option...")
                 
                 try:
                     # The radio input is hidden, so we click the label instead
-                    six_months_label = page.locator("label[for='6 mois']")
-                    six_months_label.wait_for(state="visible", timeout=20000)
+                    six_months_label = locs["six_months"]
+                    await six_months_label.wait_for(state="visible", timeout=20000)
                     logger.info("6 months label found and visible")
                     
                     # Set up response capture BEFORE clicking
-                    with page.expect_response(
-                        lambda r: "/offer/api/offers" in r.url and r.status == 200,
+                    async with page.expect_response(
+                        lambda r: _OFFERS_URL_SUBSTR in r.url and r.status == 200,
                         timeout=20000
                     ) as response_promise:
                         logger.info("Clicking 6 months label...")
-                        six_months_label.click()
+                        await six_months_label.click()
                         logger.info("6 months label clicked, waiting for response...")
-                        random_sleep(2000, 2500)
                     
                     # Get the response
-                    response_6m = response_promise.value
-                    semi_annual_response = response_6m.json()
-                    logger.info("Captured 6-month quotation from expect_response")
+                    response_6m = await response_promise.value
+                    semi_annual_response = extract_offers(orjson.loads(await response_6m.body()))
+                    logger.info(f"Captured 6-month quotation: {len(semi_annual_response or [])} packages")
                     
                 except Exception as e:
                     logger.warning(f"6-month quotation capture failed: {e}")
                     semi_annual_response = None
 
-                # Log captured responses
-                logger.info(f"Total API responses captured: {len(captured_responses)}")
-                
-                # Extract quotation data from responses
-                try:
-                    if captured_responses and len(captured_responses) > 0:
-                        annual_data = captured_responses[0]
-                        if isinstance(annual_data, dict) and "offers" in annual_data:
-                            annual_response = annual_data["offers"]
-                            logger.info(f"✓ Annual offers: {len(annual_response) if annual_response else 0} packages")
-                except Exception as e:
-                    logger.warning(f"Could not extract annual data: {e}")
-                
-                try:
-                    if captured_responses and len(captured_responses) > 1:
-                        semi_annual_data = captured_responses[1]
-                        if isinstance(semi_annual_data, dict) and "offers" in semi_annual_data:
-                            semi_annual_response = semi_annual_data["offers"]
-                            logger.info(f"✓ Semi-annual offers: {len(semi_annual_response) if semi_annual_response else 0} packages")
-                except Exception as e:
-                    logger.warning(f"Could not extract semi-annual data: {e}")
-
                 # Return simplified response with only essential data
                 success = annual_response is not None
                 logger.info(f"Scraping complete - Success: {success}")
@@ -358,7 +398,7 @@ def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
             except Exception as e:
                 logger.error(f"Error during scraping: {e}")
                 try:
-                    page.screenshot(path="rma_error_debug.png")
+                    await page.screenshot(path="rma_error_debug.png")
                 except:
                     pass
                 
@@ -367,8 +407,6 @@ def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
                     "annual": [],
                     "semi_annual": []
                 }
-            finally:
-                random_sleep(2000, 3000)
 
     except Exception as e:
         logger.error(f"Browser error: {e}")
@@ -379,6 +417,27 @@ def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+def scrape_rma(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Sync entry point for scrape_rma_async (runs it on a fresh event loop)"""
+    return asyncio.run(scrape_rma_async(params))
+
+
+def _filter_packages(packages):
+    """Keep libelle, primeTotalTTC and the included guarantee labels (points) of each package"""
+    if not packages or not isinstance(packages, list):
+        return []
+
+    return [
+        {
+            'libelle': pkg.get('libelle', ''),
+            'primeTotalTTC': pkg.get('primeTotalTTC', 0),
+            'points': [label for g in (pkg.get('garanties') or ())
+                       if g.get('included') and (label := g.get('libelle'))],
+        }
+        for pkg in packages if pkg
+    ]
+
+
 def filter_rma_response(raw_response: Dict[str, Any]) -> Dict[str, Any]:
     """
     Filter RMA response to return only the needed fields for display:
@@ -391,35 +450,10 @@ def filter_rma_response(raw_response: Dict[str, Any]) -> Dict[str, Any]:
     if not raw_response or not raw_response.get('success'):
         return raw_response
 
-    def filter_packages(packages):
-        if not packages or not isinstance(packages, list):
-            return []
-
-        filtered = []
-        for pkg in packages:
-            if not pkg:
-                continue
-
-            # Extract only included guarantee labels as points
-            points = []
-            for g in pkg.get('garanties', []):
-                if g.get('included', False):
-                    label = g.get('libelle', '')
-                    if label:
-                        points.append(label)
-
-            filtered.append({
-                'libelle': pkg.get('libelle', ''),
-                'primeTotalTTC': pkg.get('primeTotalTTC', 0),
-                'points': points
-            })
-
-        return filtered
-
     return {
         'success': True,
-        'annual': filter_packages(raw_response.get('annual', [])),
-        'semi_annual': filter_packages(raw_response.get('semi_annual', []))
+        'annual': _filter_packages(raw_response.get('annual', [])),
+        'semi_annual': _filter_packages(raw_response.get('semi_annual', []))
     }
 
 
@@ -448,7 +482,7 @@ def test_rma_scraper():
     print("=" * 60)
     print("RMA SCRAPER TEST")
     print("=" * 60)
-    print(f"Testing with parameters: {json.dumps(test_params, indent=2)}")
+    print(f"Testing with parameters: {orjson.dumps(test_params, option=orjson.OPT_INDENT_2).decode()}")
     print("-" * 60)
     
     result = scrape_rma(test_params)
@@ -476,8 +510,8 @@ def test_rma_scraper():
             print("  - Not captured")
         
         # Save result to file
-        with open("rma_test_result.json", "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        with open("rma_test_result.json", "wb") as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
         print("\nFull result saved to: rma_test_result.json")
     else:
         print("[FAIL] Test FAILED")
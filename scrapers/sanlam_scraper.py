@@ -4,11 +4,74 @@ Fetches quotations from Sanlam Morocco API
 Supports both 6-month and 12-month pricing
 """
 
-import requests
-import time
+import asyncio
+import hashlib
+import logging
+import os
+import httpx
+import orjson
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
+from ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "User-Agent": "Mozilla/5.0"
+}
+
+# Max formula-pricing calls in flight per scrape (shared by both periods)
+FORMULA_CONCURRENCY = 4
+
+# Pricing responses are pure functions of their payload: identical quotes are served
+# from memory for CACHE_TTL seconds. SANLAM_CACHE=0 disables the cache.
+CACHE_TTL = 3600
+CACHE_MAX_ENTRIES = 512
+_CACHE_ENABLED = os.getenv('SANLAM_CACHE', '1') != '0'
+_cache = TTLCache(ttl=CACHE_TTL, maxsize=CACHE_MAX_ENTRIES)
+
+
+def _cache_key(*parts):
+    """Stable hash of JSON-serialisable parts"""
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+
+
+def _pricing_key(payload):
+    """
+    Cache key for a pricing payload. The dummy phone and plate that FieldMapper
+    generates per request do not affect the price, so they are left out.
+    """
+    normalized = {k: v for k, v in payload.items() if k not in ('driver', 'subscriber', 'vehicle')}
+    for section in ('driver', 'subscriber'):
+        normalized[section] = {k: v for k, v in payload.get(section, {}).items() if k != 'phoneNumber'}
+    normalized['vehicle'] = {k: v for k, v in payload.get('vehicle', {}).items() if k != 'registrationNumber'}
+    return _cache_key("pricing", normalized)
+
+
+def _cache_get(key):
+    return _cache.get(key) if _CACHE_ENABLED else None
+
+
+def _cache_set(key, value):
+    if _CACHE_ENABLED:
+        _cache.set(key, value)
+
+
+def _new_client():
+    """
+    One client per scrape: over HTTP/2 every call shares a single connection.
+    The transport retries connection failures only, so a POST that reached Sanlam
+    is never replayed - recalculate-pricing saves a policy.
+    """
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        timeout=60,
+        transport=httpx.AsyncHTTPTransport(http2=True, retries=3)
+    )
+
 
 def calculate_end_date(start_date, duration_months):
     """Calculate end date exactly N months minus 1 day"""
@@ -16,11 +79,12 @@ def calculate_end_date(start_date, duration_months):
     return end_date.strftime("%Y-%m-%d")
 
 
-def fetch_sanlam_pricing(payload, duration_months=12):
+async def fetch_sanlam_pricing(client, payload, duration_months=12):
     """
     Fetch pricing from Sanlam API
 
     Args:
+        client: httpx.AsyncClient from _new_client()
         payload: Dictionary with driver, subscriber, vehicle, policy, agent data
         duration_months: 6 or 12 for semi-annual or annual
 
@@ -29,86 +93,94 @@ def fetch_sanlam_pricing(payload, duration_months=12):
     """
     url = "https://souscription-en-ligne.sanlam.ma/api/auto/recalculate-pricing"
 
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "User-Agent": "Mozilla/5.0"
-    }
+    key = _pricing_key(payload)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
+        response = await client.post(url, content=orjson.dumps(payload))
 
-        data = response.json()
-
-        if data.get("status") != 200:
-            print(f"Sanlam API returned status: {data.get('status')} for {duration_months}m")
+        # HTTP errors and API-level errors (status field in the body) share one check
+        data = orjson.loads(response.content) if response.status_code < 400 else {}
+        status = data.get("status") if data else response.status_code
+        if status != 200:
+            logger.warning(f"Sanlam API returned status: {status} for {duration_months}m")
             return None
 
-        return data.get("data", {})
+        pricing_data = data.get("data", {})
+        _cache_set(key, pricing_data)
+        return pricing_data
 
     except Exception as e:
-        print(f"Sanlam Pricing Error ({duration_months}m): {str(e)}")
+        logger.warning(f"Sanlam Pricing Error ({duration_months}m): {str(e)}")
         return None
 
 
-def fetch_formula_pricing(formula, policy_id, agent_key):
+async def fetch_formula_pricing(client, formula, policy_id, agent_key, slots=None):
     """
     Fetch detailed pricing for a specific formula
 
     Args:
+        client: httpx.AsyncClient from _new_client()
         formula: Formula object from initial pricing response
         policy_id: Policy ID from initial pricing response
         agent_key: Agent key
+        slots: Optional asyncio.Semaphore bounding concurrent formula calls
 
     Returns:
         Formula pricing data or None on error
     """
     url = "https://souscription-en-ligne.sanlam.ma/api/auto/formula-pricing"
 
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "User-Agent": "Mozilla/5.0"
-    }
-
     formula_payload = {
         "formula": formula,
         "agent": {"agentkey": agent_key},
         "id": policy_id
     }
 
-    try:
-        response = requests.post(url, json=formula_payload, headers=headers, timeout=60)
-        response.raise_for_status()
-
-        result = response.json()
+    key = _cache_key("formula", policy_id, formula.get('name'), formula.get('code'))
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
 
-        if result.get("status") == 200:
-            return result.get("data", {}).get("pricing", {})
+    try:
+        if slots is not None:
+            async with slots:
+                response = await client.post(url, content=orjson.dumps(formula_payload))
         else:
-            print(f"Formula {formula.get('name')} returned status: {result.get('status')}")
+            response = await client.post(url, content=orjson.dumps(formula_payload))
+
+        result = orjson.loads(response.content) if response.status_code < 400 else {}
+        status = result.get("status") if result else response.status_code
+        if status != 200:
+            logger.warning(f"Formula {formula.get('name')} returned status: {status}")
             return None
 
+        pricing = result.get("data", {}).get("pricing", {})
+        if pricing:
+            _cache_set(key, pricing)
+        return pricing
+
     except Exception as e:
-        print(f"Error fetching formula {formula.get('name', 'unknown')}: {e}")
+        logger.warning(f"Error fetching formula {formula.get('name', 'unknown')}: {e}")
         return None
 
 
-def fetch_all_formulas(payload, duration_months=12):
+async def fetch_formula_details(client, pricing_data, payload, duration_months=12, slots=None):
     """
-    Fetch pricing and all formula details
+    Fetch the detailed pricing of every formula in a recalculate-pricing result
 
     Args:
-        payload: Complete request payload
+        client: httpx.AsyncClient from _new_client()
+        pricing_data: Result of fetch_sanlam_pricing (may be None)
+        payload: Request payload the pricing was computed from
         duration_months: 6 or 12
+        slots: Optional asyncio.Semaphore bounding concurrent formula calls
 
     Returns:
         List of formula pricing details
     """
-    # Get initial pricing with formulas list
-    pricing_data = fetch_sanlam_pricing(payload, duration_months)
-
     if not pricing_data:
         return []
 
@@ -117,22 +189,45 @@ def fetch_all_formulas(payload, duration_months=12):
     agent_key = payload.get("agent", {}).get("agentkey", "68103")
 
     if not policy_id or not formulas:
-        print(f"No policy ID or formulas returned for {duration_months}m")
+        logger.debug(f"No policy ID or formulas returned for {duration_months}m")
         return []
 
-    # Fetch detailed pricing for each formula
-    formula_details = []
+    # Fetch detailed pricing for each formula concurrently (gather keeps the API's formula order)
+    details = await asyncio.gather(
+        *(fetch_formula_pricing(client, formula, policy_id, agent_key, slots) for formula in formulas)
+    )
+    return [detail for detail in details if detail]
 
-    for formula in formulas:
-        detail = fetch_formula_pricing(formula, policy_id, agent_key)
-        if detail:
-            formula_details.append(detail)
-        time.sleep(1)  # Small delay between requests
 
-    return formula_details
+async def fetch_all_formulas_async(client, payload, duration_months=12, slots=None):
+    """
+    Fetch pricing and all formula details
 
+    Args:
+        client: httpx.AsyncClient from _new_client()
+        payload: Complete request payload
+        duration_months: 6 or 12
+        slots: Optional asyncio.Semaphore bounding concurrent formula calls
 
-def scrape_sanlam(params):
+    Returns:
+        List of formula pricing details
+    """
+    # Get initial pricing with formulas list
+    pricing_data = await fetch_sanlam_pricing(client, payload, duration_months)
+    return await fetch_formula_details(client, pricing_data, payload, duration_months, slots)
+
+
+def fetch_all_formulas(payload, duration_months=12):
+    """Sync entry point for fetch_all_formulas_async, with its own client"""
+    async def run():
+        async with _new_client() as client:
+            return await fetch_all_formulas_async(
+                client, payload, duration_months, asyncio.Semaphore(FORMULA_CONCURRENCY)
+            )
+    return asyncio.run(run())
+
+
+async def scrape_sanlam_async(params):
     """
     Main function to scrape Sanlam - Can be called from website
 
@@ -154,7 +249,7 @@ def scrape_sanlam(params):
     end_date_12m = calculate_end_date(start_date, 12)
     end_date_6m = calculate_end_date(start_date, 6)
 
-    # Fetch 12-month pricing
+    # 12-month payload
     payload_12m = base_payload.copy()
     
     payload_12m["policy"] = {
@@ -163,10 +258,8 @@ def scrape_sanlam(params):
         "maturityContractType": "2",
         "duration": 12
     }
-    print(payload_12m)
-    annual_formulas = fetch_all_formulas(payload_12m, 12)
 
-    # Fetch 6-month pricing
+    # 6-month payload
     payload_6m = base_payload.copy()
     payload_6m["policy"] = {
         "startDate": start_date_str,
@@ -174,7 +267,25 @@ def scrape_sanlam(params):
         "duration": 6,
         "maturityContractType": "2"
     }
-    semi_annual_formulas = fetch_all_formulas(payload_6m, 6)
+
+    # Both periods and all their formula calls run on one client, on one event loop
+    async with _new_client() as client:
+        pricing_12m, pricing_6m = await asyncio.gather(
+            fetch_sanlam_pricing(client, payload_12m, 12),
+            fetch_sanlam_pricing(client, payload_6m, 6)
+        )
+
+        # A rejected 12-month quote (validation or auth) means the 6-month one is no
+        # good either: skip every formula call
+        if not pricing_12m:
+            logger.debug("Sanlam 12m pricing failed, skipping formula pricing")
+            return {"annual": [], "semi_annual": []}
+
+        slots = asyncio.Semaphore(FORMULA_CONCURRENCY)
+        annual_formulas, semi_annual_formulas = await asyncio.gather(
+            fetch_formula_details(client, pricing_12m, payload_12m, 12, slots),
+            fetch_formula_details(client, pricing_6m, payload_6m, 6, slots)
+        )
 
     return {
         "annual": annual_formulas,
@@ -182,6 +293,11 @@ def scrape_sanlam(params):
     }
 
 
+def scrape_sanlam(params):
+    """Sync entry point for scrape_sanlam_async (runs it on a fresh event loop)"""
+    return asyncio.run(scrape_sanlam_async(params))
+
+
 # ===== FOR LOCAL TESTING =====
 if __name__ == "__main__":
     # Hardcoded payload for testing
@@ -1,143 +1,154 @@
+# Usage: python -m scrapers.testing [--refresh-template]
 
-import time
-import random
-import json
-from camoufox.sync_api import Camoufox
+import os
+import sys
+import asyncio
+import httpx
+import orjson
+from camoufox.async_api import AsyncCamoufox
+from ._rma_common import block_heavy_resources, fill_form_bulk, mock_offers, write_output
+from .rma_scraper import build_locators, fill_mui_dropdown_async
+
+OFFERS_URL = "https://direct.rmaassurance.com/offer/api/offers"
+
+# Payload + headers of the last offers request seen in the browser; replayed over
+# plain HTTP until refreshed with --refresh-template
+TEMPLATE_FILE = "offer_template.json"
+
+# Headers the HTTP client sets itself
+_SKIP_HEADERS = {"host", "content-length", "connection", "accept-encoding"}
 
 # Store captured request/response data
 captured_requests = []
 
-def random_sleep(min_ms=500, max_ms=1500):
-    time.sleep(random.uniform(min_ms, max_ms) / 1000)
+_NEEDLE = "/offer/api/offers"
 
-def fill_mui_dropdown(page, label_text, value):
-    """Handles MUI dropdowns by clicking the input via its label and selecting an option."""
-    print(f"Selecting {label_text}: {value}...")
-    try:
-        # Use fuzzy text matching for the label to handle the curly ' and *
-        dropdown_input = page.locator(f"div.direct-MuiAutocomplete-root:has(label:has-text('{label_text}')) input")
-        dropdown_input.wait_for(state="visible", timeout=10000)
-        
-        dropdown_input.click()
-        random_sleep(300, 600)
-        dropdown_input.fill(value)
-        
-        # Wait for the listbox to appear
-        page.wait_for_selector("ul[role='listbox']", timeout=5000)
-        random_sleep(500, 800)
-        
-        # Find the exact matching option in the listbox
-        listbox_options = page.locator("ul[role='listbox'] li[role='option']")
-        option_count = listbox_options.count()
-        
-        # Try to find the exact matching option
-        found = False
-        for i in range(option_count):
-            option_text = listbox_options.nth(i).inner_text().strip()
-            if value.upper() in option_text.upper():
-                print(f"Found matching option: {option_text}")
-                listbox_options.nth(i).click()
-                found = True
-                break
-        
-        if not found:
-            # Fallback: select first option if exact match not found
-            print(f"Exact match not found for '{value}', selecting first option")
-            page.keyboard.press("ArrowDown")
-            page.keyboard.press("Enter")
-        
-        random_sleep(800, 1200)
-    except Exception as e:
-        print(f"Warning: Could not select {label_text}: {e}")
 
-def run():
-    def capture_request(request):
-        """Intercept and capture all requests."""
-        try:
-            if "/offer/api/offers" in request.url:
-                request_data = {
-                    "url": request.url,
-                    "method": request.method,
-                    "headers": dict(request.headers),
-                }
-                # Try to capture post data
-                try:
-                    if request.post_data:
-                        request_data["payload"] = request.post_data
-                        # Try to parse as JSON
-                        try:
-                            request_data["payload_parsed"] = json.loads(request.post_data)
-                        except:
-                            pass
-                except:
-                    pass
-                captured_requests.append(request_data)
-        except Exception as e:
-            print(f"Error capturing request: {e}")
-    
-    with Camoufox(headless=True, humanize=True, os="windows", geoip=True) as browser:
-        page = browser.new_page()
+def capture_request(request, _captured=captured_requests.append, _needle=_NEEDLE):
+    """Page 'request' handler: keep the offers call, return early for everything else.
+    Runs for every request the page makes, so lookups are bound as defaults and the
+    payload is parsed later (parse_payloads)."""
+    url = request.url
+    if _needle not in url:
+        return
+    _captured({"url": url, "method": request.method, "headers": dict(request.headers), "payload": request.post_data})
+
+
+def parse_payloads(requests):
+    """Decode the captured JSON bodies into payload_parsed"""
+    for req in requests:
+        if req.get("payload"):
+            try:
+                req["payload_parsed"] = orjson.loads(req["payload"])
+            except orjson.JSONDecodeError:
+                pass
+
+
+def save_template(request_data):
+    """Keep the captured offers request so later runs can skip the browser"""
+    template = {
+        "payload": request_data["payload_parsed"],
+        "headers": {k: v for k, v in request_data["headers"].items() if k.lower() not in _SKIP_HEADERS},
+    }
+    with open(TEMPLATE_FILE, "wb") as f:
+        f.write(orjson.dumps(template, option=orjson.OPT_INDENT_2))
+    print(f"Offer template saved to {TEMPLATE_FILE}")
+
+
+def replay():
+    """POST the saved offers payload directly, no browser"""
+    with open(TEMPLATE_FILE, "rb") as f:
+        template = orjson.loads(f.read())
+
+    print(f"--- Replaying {TEMPLATE_FILE} ---")
+    headers = httpx.Headers(template["headers"])
+    headers.setdefault("Content-Type", "application/json")
+    r = httpx.post(OFFERS_URL, content=orjson.dumps(template["payload"]), headers=headers, timeout=30)
+    r.raise_for_status()
+
+    output_data = {
+        "captured_requests": [{"url": OFFERS_URL, "method": "POST", "payload_parsed": template["payload"]}],
+        "response": orjson.loads(r.content)
+    }
+    write_output(output_data)
+    print("\nSUCCESS: Data fetched and saved to insurance_data.json")
+
+
+async def run():
+    async with AsyncCamoufox(headless=True, humanize=False, os="windows", geoip=False) as browser:
+        page = await browser.new_page()
+        await page.route("**/*", block_heavy_resources)
+        if os.getenv("OFFLINE"):
+            await mock_offers(page)
         
         # Set up request interception
         page.on("request", capture_request)
 
         try:
+            # Form locators, built once per page
+            locs = build_locators(page)
+            suivant = locs["suivant"]
+            name_input = locs["last_name"]
+
             print("--- Navigating to RMA Assurance ---")
-            page.goto("https://direct.rmaassurance.com/souscrire", timeout=60000)
+            await page.goto("https://direct.rmaassurance.com/souscrire", timeout=60000)
 
             # Step 1: Click 'Suivant' to reach the form in the screenshot
             print("--- Clicking First 'Suivant' ---")
-            page.locator("button:has-text('Suivant')").first.click()
+            await suivant.first.click()
             
-            # CRITICAL: Wait for the specific form input to be attached and visible
+            # CRITICAL: Wait for the specific form input to be attached; fill() then
+            # waits for it to be actionable on its own
             # We use the 'name' attribute from your HTML as it's the most stable
-            name_input = page.locator('input[name="subscriber.lastName"]')
-            name_input.wait_for(state="visible", timeout=20000)
-            random_sleep(1000, 2000)
+            await name_input.wait_for(state="attached", timeout=20000)
 
             # --- Step 2: Fill Form using name attributes ---
             print("--- Filling Form Details ---")
             
-            # Personal Info
-            page.locator('input[name="subscriber.lastName"]').fill("Huzaifa")
-            page.locator('input[name="subscriber.firstName"]').fill("Saeed")
-            
-            # Ville (Dropdown)
-            fill_mui_dropdown(page, "Ville", "CASABLANCA")
-            
-            # Phone
-            page.locator('input[name="subscriber.phone"]').fill("0666666666")
-
+            # Personal Info - plain inputs are independent, so they are filled in one go
             # Dates - Using placeholders because the label text is tricky
             # Format: JJ/MM/AAAA or YYYY-MM-DD depending on browser locale
-            page.locator('input[placeholder="JJ/MM/AAAA"]').nth(0).fill("01/01/1991")
-            page.locator('input[placeholder="JJ/MM/AAAA"]').nth(1).fill("01/01/2012")
+            personal_fields = [
+                ('input[name="subscriber.lastName"]', 0, "Huzaifa"),
+                ('input[name="subscriber.firstName"]', 0, "Saeed"),
+                ('input[name="subscriber.phone"]', 0, "0666666666"),
+                ('input[placeholder="JJ/MM/AAAA"]', 0, "01/01/1991"),
+                ('input[placeholder="JJ/MM/AAAA"]', 1, "01/01/2012"),
+            ]
+            await fill_form_bulk(page, personal_fields)
+            
+            # Ville (Dropdown) - dropdowns share one listbox overlay, so they stay sequential
+            await fill_mui_dropdown_async(page, locs["city"], "CASABLANCA", "Ville", state="attached")
 
             # Vehicle Section
-            page.mouse.wheel(0, 600)
-            random_sleep(1000, 1500)
+            await page.mouse.wheel(0, 600)
 
-            fill_mui_dropdown(page, "Type de plaque", "Plaque standard")
-            page.locator('input[name="vehicleInformations.plateNumber"]').fill("0000-F-00")
+            await fill_mui_dropdown_async(page, locs["plate_type"], "Plaque standard", "Type de plaque", state="attached")
+            await fill_mui_dropdown_async(page, locs["fiscal_power"], "6", "Puissance fiscale", state="attached")
+            await fill_mui_dropdown_async(page, locs["fuel"], "DIESEL", "Combustible", state="attached")
             
-            fill_mui_dropdown(page, "Puissance fiscale", "6")
-            fill_mui_dropdown(page, "Combustible", "DIESEL")
-            
-            # Vehicle Date
-            page.locator('input[placeholder="JJ/MM/AAAA"]').nth(2).fill("01/01/2023")
-            
-            # Prices
-            page.locator('input[name="vehicleInformations.newPrice"]').fill("400000")
-            page.locator('input[name="vehicleInformations.marketPrice"]').fill("300000")
-            page.locator('input[name="vehicleInformations.placesNumber"]').fill("5")
+            # Plate number (follows the plate type), vehicle date, prices and seats
+            vehicle_fields = [
+                ('input[name="vehicleInformations.plateNumber"]', 0, "0000-F-00"),
+                ('input[placeholder="JJ/MM/AAAA"]', 2, "01/01/2023"),
+                ('input[name="vehicleInformations.newPrice"]', 0, "400000"),
+                ('input[name="vehicleInformations.marketPrice"]', 0, "300000"),
+                ('input[name="vehicleInformations.placesNumber"]', 0, "5"),
+            ]
+            await fill_form_bulk(page, vehicle_fields)
 
             # --- Step 3: Submit & Capture ---
             print("--- Submitting Form ---")
-            with page.expect_response(lambda r: "/offer/api/offers" in r.url and r.status == 200, timeout=30000) as resp:
-                page.locator("button:has-text('Suivant')").last.click()
+            # Glob is matched by Playwright itself, no Python callback per response
+            async with page.expect_response("**/offer/api/offers*", timeout=30000) as resp:
+                await suivant.last.click()
+            response = await resp.value
+            if response.status != 200:
+                raise RuntimeError(f"offers API returned {response.status}")
 
             # --- Step 4: Save Result ---
-            response_data = resp.value.json()
+            response_data = await response.json()
+            parse_payloads(captured_requests)
             
             # Combine request and response data
             output_data = {
@@ -145,8 +156,11 @@ def run():
                 "response": response_data
             }
             
-            with open("insurance_data.json", "w", encoding="utf-8") as f:
-                json.dump(output_data, f, indent=4, ensure_ascii=False)
+            write_output(output_data)
+
+            parsed = [req for req in captured_requests if "payload_parsed" in req]
+            if parsed:
+                save_template(parsed[-1])
             
             print("\n=== VERIFICATION REPORT ===")
             print(f"Total requests captured: {len(captured_requests)}")
@@ -156,16 +170,19 @@ def run():
                 print(f"Method: {req['method']}")
                 if "payload_parsed" in req:
                     print(f"Payload (parsed):")
-                    print(json.dumps(req["payload_parsed"], indent=2, ensure_ascii=False))
-                elif "payload" in req:
+                    print(orjson.dumps(req["payload_parsed"], option=orjson.OPT_INDENT_2).decode())
+                elif req.get("payload"):
                     print(f"Payload (raw): {req['payload']}")
             print("\nSUCCESS: Data captured and saved to insurance_data.json")
 
         except Exception as e:
             print(f"Critical Error: {e}")
-            page.screenshot(path="error_debug.png")
-        finally:
-            random_sleep(5000, 7000)
+            await page.screenshot(path="error_debug.png")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    # The browser is only needed to (re)capture the request; once a template exists
+    # the offers API is called directly
+    if "--refresh-template" in sys.argv or not os.path.exists(TEMPLATE_FILE):
+        asyncio.run(run())
+    else:
+        replay()
\ No newline at end of file
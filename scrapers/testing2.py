@@ -1,129 +1,180 @@
-import time
-import random
-import json
-from playwright.sync_api import sync_playwright
+# Usage: python -m scrapers.testing2 [runs]
 
-# --- HELPER FUNCTIONS ---
+import os
+import sys
+import asyncio
+from playwright.async_api import async_playwright
+from ._rma_common import block_heavy_resources, fill_form_bulk, mock_offers, write_output
+from .rma_scraper import build_locators, fill_mui_dropdown_async
 
-def random_sleep(min_ms=500, max_ms=1500):
-    """Sleeps for a random amount of milliseconds."""
-    time.sleep(random.uniform(min_ms, max_ms) / 1000)
+# Browser profile reused across runs
+PROFILE_DIR = os.getenv("RMA_PROFILE_DIR", "/tmp/rma_profile")
 
-def fill_mui_dropdown(page, label_text, value):
-    """Handles MUI dropdowns using standard Playwright locators."""
-    print(f"Selecting {label_text}: {value}...")
+# Posts a known offers payload from inside the page: same origin and cookies as the
+# form's own submit, without the MUI validation and button transitions
+_FETCH_OFFERS_JS = """async (body) => {
+    const r = await fetch('/offer/api/offers', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body,
+        credentials: 'include',
+    });
+    if (!r.ok) throw new Error('offers API returned ' + r.status);
+    return r.json();
+}"""
+
+
+async def fill_and_submit(page):
+    """Go through the quote form and submit it; returns the offers JSON"""
+    # Form locators, built once per page
+    locs = build_locators(page)
+    suivant = locs["suivant"]
+    name_input = locs["last_name"]
+
+    # --- Handle Cookie Banner ---
     try:
-        # Using a more robust selector for MUI Autocomplete
-        dropdown_input = page.locator(f"div.direct-MuiAutocomplete-root:has(label:has-text('{label_text}')) input")
-        dropdown_input.wait_for(state="visible", timeout=10000)
+        await page.locator("button:has-text('Accepter')").click(timeout=5000)
+        print("Cookies accepted.")
+    except:
+        pass
+
+    # --- Step 1: Transition ---
+    print("--- Clicking First 'Suivant' ---")
+    await suivant.first.click()
+
+    # Wait for form to actually load
+    await name_input.wait_for(state="attached", timeout=20000)
+
+    # --- Step 2: Fill Form ---
+    print("--- Filling Form Details ---")
+
+    # Personal Info + dates via placeholders (independent inputs, filled in one go)
+    personal_fields = [
+        ('input[name="subscriber.lastName"]', 0, "Huzaifa"),
+        ('input[name="subscriber.firstName"]', 0, "Saeed"),
+        ('input[name="subscriber.phone"]', 0, "0666666666"),
+        ('input[placeholder="JJ/MM/AAAA"]', 0, "01/01/1991"),
+        ('input[placeholder="JJ/MM/AAAA"]', 1, "01/01/2012"),
+    ]
+    await fill_form_bulk(page, personal_fields)
+
+    # Dropdowns share one listbox overlay, so they stay sequential
+    await fill_mui_dropdown_async(page, locs["city"], "CASABLANCA", "Ville", state="attached")
+
+    # Scroll to Vehicle Section
+    await page.mouse.wheel(0, 600)
+
+    # Vehicle Info
+    await fill_mui_dropdown_async(page, locs["plate_type"], "Plaque standard", "Type de plaque", state="attached")
+    await fill_mui_dropdown_async(page, locs["fiscal_power"], "6", "Puissance fiscale", state="attached")
+    await fill_mui_dropdown_async(page, locs["fuel"], "DIESEL", "Combustible", state="attached")
+
+    # Plate number (follows the plate type), vehicle date and numerical values
+    vehicle_fields = [
+        ('input[name="vehicleInformations.plateNumber"]', 0, "0000-F-00"),
+        ('input[placeholder="JJ/MM/AAAA"]', 2, "01/01/2023"),
+        ('input[name="vehicleInformations.newPrice"]', 0, "400000"),
+        ('input[name="vehicleInformations.marketPrice"]', 0, "300000"),
+        ('input[name="vehicleInformations.placesNumber"]', 0, "5"),
+    ]
+    await fill_form_bulk(page, vehicle_fields)
+
+    # --- Step 3: Submit & Capture Traffic ---
+    print("--- Submitting & Capturing API Traffic ---")
+
+    # Glob is matched by Playwright itself, no Python callback per response
+    async with page.expect_response("**/offer/api/offers*", timeout=30000) as resp:
+        await suivant.last.click()
+    response = await resp.value
+    if response.status != 200:
+        raise RuntimeError(f"offers API returned {response.status}")
+
+    return await response.json()
+
+
+async def scrape(context, payload=None):
+    """Run one quote on a fresh page of an already-open context.
+
+    With a payload (raw JSON body of an earlier offers request) the form is skipped and
+    the offers API is called from the page. Returns (offers JSON, payload) or (None, payload).
+    """
+    page = await context.new_page()
+    await page.route("**/*", block_heavy_resources)
+    if os.getenv("OFFLINE"):
+        await mock_offers(page)
+
+    # Capture the offers request payload from the CDP Network domain directly,
+    # rather than building a Playwright Request object in Python for every resource
+    captured_requests = []
+
+    def on_request_will_be_sent(event):
+        if "/offer/api/offers" in event["request"]["url"]:
+            captured_requests.append(event["request"])
+
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Network.enable")
+    cdp.on("Network.requestWillBeSent", on_request_will_be_sent)
+
+    try:
+        print("--- Navigating to RMA Assurance ---")
+        await page.goto("https://direct.rmaassurance.com/souscrire", timeout=60000)
         
-        dropdown_input.click()
-        random_sleep(300, 600)
-        dropdown_input.fill(value)
+        if payload is not None:
+            # --- Direct API call on the warm page ---
+            print("--- Posting known payload to the offers API ---")
+            json_data = await page.evaluate(_FETCH_OFFERS_JS, payload)
+        else:
+            json_data = await fill_and_submit(page)
+
+        # --- Step 4: Process Results ---
+        output_data = {
+            "captured_requests": captured_requests,
+            "response": json_data
+        }
+        write_output(output_data)
         
-        # Wait for the dropdown options listbox
-        page.wait_for_selector("ul[role='listbox']", timeout=5000)
-        random_sleep(500, 800)
+        print("\n" + "="*30)
+        print(f"SUCCESS: Data captured and saved ({len(captured_requests)} offers request(s) captured).")
+        print("="*30)
+
+        if captured_requests:
+            payload = captured_requests[-1].get("postData", payload)
+        return json_data, payload
 
-        page.keyboard.press("ArrowDown")
-        page.keyboard.press("Enter")
-        random_sleep(800, 1200)
     except Exception as e:
-        print(f"Warning: Could not select {label_text}: {e}")
+        print(f"Critical Error: {e}")
+        await page.screenshot(path="error_playwright.png")
+        print("Error screenshot saved.")
+        return None, payload
 
-def run():
-    with sync_playwright() as p:
+    finally:
+        await cdp.detach()
+        await page.close()
+
+async def run(runs=1):
+    async with async_playwright() as p:
         # --- BROWSER CONFIGURATION ---
-        # Using Firefox as it's generally more stable for this specific site's MUI
-        browser = p.firefox.launch(headless=True) 
-        
-        # Adding a realistic User Agent and Locale for anti-detection
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+        # Chromium is driven over CDP directly, with less per-command overhead than
+        # Firefox; the selectors used here are plain DOM and behave the same.
+        # A persistent profile keeps cookies (banner already accepted), site data and
+        # the script cache between invocations, and one context serves every run.
+        context = await p.chromium.launch_persistent_context(
+            PROFILE_DIR,
+            headless=True,
+            args=["--disable-blink-features=AutomationControlled", "--no-sandbox"],
+            # French locale like a local visitor
             locale="fr-FR",
             viewport={'width': 1920, 'height': 1080}
         )
-        
-        page = context.new_page()
 
         try:
-            print("--- Navigating to RMA Assurance ---")
-            page.goto("https://direct.rmaassurance.com/souscrire", timeout=60000)
-            
-            # --- Handle Cookie Banner ---
-            try:
-                page.locator("button:has-text('Accepter')").click(timeout=5000)
-                print("Cookies accepted.")
-            except:
-                pass
-
-            # --- Step 1: Transition ---
-            print("--- Clicking First 'Suivant' ---")
-            page.locator("button:has-text('Suivant')").first.click()
-            
-            # Wait for form to actually load
-            name_input = page.locator('input[name="subscriber.lastName"]')
-            name_input.wait_for(state="visible", timeout=20000)
-            random_sleep(1000, 2000)
-
-            # --- Step 2: Fill Form ---
-            print("--- Filling Form Details ---")
-            
-            # Personal Info
-            page.locator('input[name="subscriber.lastName"]').fill("Huzaifa")
-            page.locator('input[name="subscriber.firstName"]').fill("Saeed")
-            
-            fill_mui_dropdown(page, "Ville", "CASABLANCA")
-            page.locator('input[name="subscriber.phone"]').fill("0666666666")
-
-            # Dates via Placeholders
-            page.locator('input[placeholder="JJ/MM/AAAA"]').nth(0).fill("01/01/1991")
-            page.locator('input[placeholder="JJ/MM/AAAA"]').nth(1).fill("01/01/2012")
-
-            # Scroll to Vehicle Section
-            page.mouse.wheel(0, 600)
-            random_sleep(1000, 1500)
-
-            # Vehicle Info
-            fill_mui_dropdown(page, "Type de plaque", "Plaque standard")
-            page.locator('input[name="vehicleInformations.plateNumber"]').fill("0000-F-00")
-            
-            fill_mui_dropdown(page, "Puissance fiscale", "6")
-            fill_mui_dropdown(page, "Combustible", "DIESEL")
-            
-            page.locator('input[placeholder="JJ/MM/AAAA"]').nth(2).fill("01/01/2023")
-            
-            # Numerical Values
-            page.locator('input[name="vehicleInformations.newPrice"]').fill("400000")
-            page.locator('input[name="vehicleInformations.marketPrice"]').fill("300000")
-            page.locator('input[name="vehicleInformations.placesNumber"]').fill("5")
-
-            # --- Step 3: Submit & Capture Traffic ---
-            print("--- Submitting & Capturing API Traffic ---")
-            
-            with page.expect_response(
-                lambda r: "/offer/api/offers" in r.url and r.status == 200, 
-                timeout=30000
-            ) as resp:
-                page.locator("button:has-text('Suivant')").last.click()
-
-            # --- Step 4: Process Results ---
-            json_data = resp.value.json()
-            with open("insurance_data.json", "w", encoding="utf-8") as f:
-                json.dump(json_data, f, indent=4)
-            
-            print("\n" + "="*30)
-            print("SUCCESS: Data captured and saved.")
-            print("="*30)
-
-        except Exception as e:
-            print(f"Critical Error: {e}")
-            page.screenshot(path="error_playwright.png")
-            print("Error screenshot saved.")
-            
+            # The first run goes through the form; later runs reuse its payload
+            payload = None
+            for _ in range(runs):
+                _, payload = await scrape(context, payload)
         finally:
-            random_sleep(5000, 7000)
-            browser.close()
+            await context.close()
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    # Optional argument: number of back-to-back quotes on the same browser
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
@@ -0,0 +1,43 @@
+"""
+In-process TTL cache shared by the database read caches and the scrapers
+"""
+
+import threading
+import time
+
+
+class TTLCache:
+    """Small thread-safe cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if key not in self._data and len(self._data) >= self._maxsize:
+                # Drop the oldest entry
+                del self._data[next(iter(self._data))]
+            self._data[key] = (time.monotonic() + self._ttl, value)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()